@@ -1,50 +1,102 @@
 """
-Main aggregation script that orchestrates the entire counting process.
+Run the counting engines over the local clones.
+
+The fetch, clone, count and render stages are driven by the loc-counter CLI
+(loc_counter.py); running this module runs its fetch, clone and count stages.
 """
-import os
 import json
 import subprocess
+import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, List
-from fetch_repos import fetch_user_repos, save_repos_list
-from clone_or_fetch import clone_or_update_all
+from typing import Dict, List, Optional
+from clone_or_fetch import REPOS_DIR
+import metrics
+
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent / 'engine'
+ENGINES = ('auto', 'rust', 'python')
 
+if str(ENGINE_DIR) not in sys.path:
+    sys.path.insert(0, str(ENGINE_DIR))
+import rust_build
 
-def run_loc_counter() -> Dict[str, int]:
+
+def run_loc_counter(repos_dir: Path = REPOS_DIR, engine: str = 'auto', workers: int = None) -> Dict[str, int]:
     """
-    Run the Rust-based LOC counter on all repositories.
+    Count lines of code in all repositories.
+    
+    Args:
+        repos_dir: Directory holding the local clones
+        engine: 'rust' (the loc_runner binary, built if missing), 'python'
+            (the in-process engine) or 'auto' (Rust, falling back to Python
+            when the binary cannot be built or run)
+        workers: Process pool size of the Python engine (default: CPU count;
+            0 counts in-process)
     
     Returns:
         Dictionary mapping language names to line counts
     """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+    
     print("\nCounting lines of code...")
     
-    # Check if the Rust binary exists
-    engine_path = Path('../engine/loc_runner')
+    if engine != 'python':
+        loc_data = run_rust_engine(repos_dir)
+        if loc_data is not None:
+            return loc_data
+        if engine == 'rust':
+            return {}
+        print("Falling back to the Python counting engine")
     
-    if not engine_path.exists():
-        print("Building Rust LOC counter...")
-        build_result = subprocess.run(
-            ['cargo', 'build', '--release'],
-            cwd='../engine',
+    return run_python_engine(repos_dir, workers)
+
+
+def build_rust_engine() -> bool:
+    """Build loc_runner with cargo and copy it to engine/loc_runner."""
+    if not rust_build.have_cargo():
+        print("Rust toolchain not found, cannot build the LOC counter")
+        return False
+    
+    print("Building Rust LOC counter...")
+    build_result = rust_build.build()
+    if build_result.returncode != 0:
+        print(f"Error building Rust counter: {build_result.stderr}")
+        return False
+    return True
+
+
+def run_rust_engine(repos_dir: Path = REPOS_DIR) -> Optional[Dict[str, int]]:
+    """
+    Run the Rust-based LOC counter.
+    
+    Returns:
+        Dictionary mapping language names to line counts, or None if the
+        binary could not be built or failed
+    """
+    engine_path = rust_build.BINARY
+    
+    # The binary is not tracked; build it, or rebuild it after a source change
+    if rust_build.is_stale() and not build_rust_engine():
+        return None
+    
+    # The engine reads ignore_rules.toml and languages.json from its working directory
+    with metrics.span('loc_runner', 'engine') as attrs:
+        started_us = metrics.now_us()
+        result = subprocess.run(
+            [str(engine_path), str(Path(repos_dir).resolve()), '--stats'],
+            cwd=ENGINE_DIR,
             capture_output=True,
             text=True
         )
-        if build_result.returncode != 0:
-            print(f"Error building Rust counter: {build_result.stderr}")
-            return {}
-    
-    # Run the counter from the engine directory with correct relative path
-    result = subprocess.run(
-        ['./loc_runner', '../aggregator/repos'],
-        cwd='../engine',
-        capture_output=True,
-        text=True
-    )
+        attrs['returncode'] = result.returncode
     
     if result.returncode != 0:
         print(f"Error running LOC counter: {result.stderr}")
-        return {}
+        return None
+    
+    record_engine_stats(result.stderr, started_us)
     
     # Parse the JSON output
     try:
@@ -52,62 +104,88 @@ def run_loc_counter() -> Dict[str, int]:
         return loc_data
     except json.JSONDecodeError as e:
         print(f"Error parsing LOC counter output: {e}")
-        return {}
+        return None
 
 
-def aggregate_and_save(username: str, token: str = None, output_file: str = 'loc_results.json'):
-    """
-    Complete aggregation pipeline:
-    1. Fetch repositories
-    2. Clone/update them
-    3. Count lines of code
-    4. Save results
+def run_python_engine(repos_dir: Path = REPOS_DIR, workers: int = None) -> Dict[str, int]:
     """
-    print("=== GitHub LOC Counter ===\n")
+    Count lines of code with the pure-Python engine (engine/py_engine.py),
+    which gives the same results as loc_runner without a Rust toolchain.
     
-    # Step 1: Fetch repositories
-    print("Step 1: Fetching repositories...")
-    repos = fetch_user_repos(username, token)
-    save_repos_list(repos)
+    Args:
+        repos_dir: Directory holding the local clones
+        workers: Size of the process pool (default: CPU count); 0 counts in-process
     
-    # Step 2: Clone/update repositories
-    print("\nStep 2: Cloning/updating repositories...")
-    successful_repos = clone_or_update_all()
-    
-    # Step 3: Count lines of code
-    print("\nStep 3: Counting lines of code...")
-    loc_data = run_loc_counter()
+    Returns:
+        Dictionary mapping language names to line counts
+    """
+    import py_engine
     
-    # Step 4: Save results
-    print("\nStep 4: Saving results...")
-    results = {
-        'username': username,
-        'total_repos': len(repos),
-        'processed_repos': len(successful_repos),
-        'languages': loc_data
-    }
+    with metrics.span('py_engine', 'engine') as attrs:
+        started_us = metrics.now_us()
+        loc_data, repo_stats = py_engine.count_loc(str(Path(repos_dir).resolve()), workers)
+        attrs['files'] = sum(stats['files_counted'] for stats in repo_stats)
     
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    record_repo_stats(repo_stats, started_us, 'py_engine')
+    return loc_data
+
+
+def count_repo(repo_path: Path, engine: str = 'auto', workers: int = None) -> Dict[str, int]:
+    """
+    Count lines of code in a single repository.
     
-    print(f"\nResults saved to {output_file}")
-    print("\nTop 8 languages by LOC:")
+    The engine counts every directory inside the directory it is given, so the
+    repository is linked into an otherwise empty temporary directory. Pass
+    workers=0 from a threaded process: the Python engine's pool forks.
     
-    # Sort languages by line count
-    sorted_langs = sorted(loc_data.items(), key=lambda x: x[1], reverse=True)[:8]
+    Returns:
+        Dictionary mapping language names to line counts
+    """
+    repo_path = Path(repo_path).resolve()
     
-    for lang, lines in sorted_langs:
-        print(f"  {lang}: {lines:,} lines")
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / repo_path.name).symlink_to(repo_path, target_is_directory=True)
+        return run_loc_counter(Path(tmp), engine, workers)
+
+
+def record_engine_stats(stderr: str, started_us: int):
+    """
+    Turn the per-repository stats printed by `loc_runner --stats` into trace events.
     
-    return results
+    Args:
+        stderr: Standard error of the engine process (one JSON object per line)
+        started_us: Timestamp at which the engine process was started
+    """
+    repo_stats = []
+    for line in stderr.splitlines():
+        try:
+            stats = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(stats, dict) and 'repo' in stats:
+            repo_stats.append(stats)
+    
+    record_repo_stats(repo_stats, started_us, 'loc_runner')
+
+
+def record_repo_stats(repo_stats: List[Dict], started_us: int, thread: str):
+    """Add one 'count' trace event per repository, with start_us relative to `started_us`."""
+    for stats in repo_stats:
+        stats = dict(stats)
+        metrics.add_event(
+            'count',
+            'engine',
+            started_us + stats.pop('start_us', 0),
+            stats.pop('elapsed_us', 0),
+            thread=thread,
+            **stats
+        )
 
 
 if __name__ == '__main__':
-    username = os.environ.get('GITHUB_USERNAME')
-    token = os.environ.get('GITHUB_TOKEN')
-    
-    if not username:
-        print("Please set GITHUB_USERNAME environment variable")
-        exit(1)
+    # The pipeline lives in the loc-counter CLI; this runs its fetch, clone and
+    # count stages with the same options and environment variables
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import loc_counter
     
-    aggregate_and_save(username, token)
\ No newline at end of file
+    loc_counter.run_stages(['fetch', 'clone', 'count'], loc_counter.build_parser().parse_args(['count']))
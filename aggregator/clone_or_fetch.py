@@ -5,48 +5,84 @@ import os
 import json
 import subprocess
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+import metrics
+from clone_store import (
+    ensure_shared_store,
+    fetch_into_shared,
+    mark_used,
+    pin_clone,
+    prune_unlisted,
+)
 
 
-REPOS_DIR = Path('repos')
+REPOS_DIR = Path(__file__).resolve().parent / 'repos'
 
 
-def ensure_repos_dir():
+def ensure_repos_dir(repos_dir: Path = REPOS_DIR):
     """Create the repos directory if it doesn't exist."""
-    REPOS_DIR.mkdir(exist_ok=True)
+    Path(repos_dir).mkdir(parents=True, exist_ok=True)
 
 
-def clone_or_update_repo(repo: Dict) -> bool:
+def clone_or_update_repo(
+    repo: Dict,
+    repos_dir: Path = REPOS_DIR,
+    shared_objects: Optional[Path] = None
+) -> bool:
     """
-    Clone a repository if it doesn't exist, otherwise pull latest changes.
+    Clone a repository if it doesn't exist, otherwise move it to the latest
+    upstream HEAD.
+    
+    Updates fetch HEAD and reset the checkout to it rather than pulling, so
+    a shallow clone follows upstream force-pushes and history rewrites.
     
     Args:
         repo: Repository dictionary from GitHub API
+        repos_dir: Directory holding the local clones
+        shared_objects: Bare repository whose objects are shared by all clones
+            (see clone_store); each clone then keeps only an alternates link,
+            and its commits are pinned in the store after every update
     
     Returns:
         True if successful, False otherwise
     """
     repo_name = repo['name']
     repo_url = repo['clone_url']
-    repo_path = REPOS_DIR / repo_name
+    repo_path = Path(repos_dir) / repo_name
     
     try:
+        # Fetch into the shared store first, so the clone/pull finds the objects there
+        if shared_objects and repo_url:
+            fetch_into_shared(shared_objects, repo_name, repo_url)
+        
         if repo_path.exists():
             print(f"Updating {repo_name}...")
-            result = subprocess.run(
-                ['git', '-C', str(repo_path), 'pull'],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode != 0:
-                print(f"  Warning: Failed to update {repo_name}")
-                print(f"  {result.stderr}")
-                return False
+            # Clones that borrow objects from the shared store are not shallow.
+            # origin/HEAD is moved as well, so the clone keeps no ref to the old history.
+            depth = [] if shared_objects else ['--depth', '1']
+            for command in (
+                ['git', '-C', str(repo_path), 'fetch', '--quiet', '--no-tags', *depth,
+                 'origin', '+HEAD:refs/remotes/origin/HEAD'],
+                ['git', '-C', str(repo_path), 'reset', '--quiet', '--hard', 'FETCH_HEAD'],
+            ):
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+                if result.returncode != 0:
+                    print(f"  Warning: Failed to update {repo_name}")
+                    print(f"  {result.stderr}")
+                    return False
         else:
             print(f"Cloning {repo_name}...")
+            if shared_objects:
+                command = ['git', 'clone', '--reference-if-able', str(shared_objects), repo_url, str(repo_path)]
+            else:
+                command = ['git', 'clone', '--depth', '1', repo_url, str(repo_path)]
             result = subprocess.run(
-                ['git', 'clone', '--depth', '1', repo_url, str(repo_path)],
+                command,
                 capture_output=True,
                 text=True,
                 timeout=120
@@ -63,26 +99,60 @@ def clone_or_update_repo(repo: Dict) -> bool:
     except Exception as e:
         print(f"  Error processing {repo_name}: {e}")
         return False
+    finally:
+        # Whatever the outcome, the shared store must keep what the clone points at
+        if shared_objects:
+            pin_clone(shared_objects, repo_name, repo_path)
 
 
-def clone_or_update_all(repos_file: str = 'repos.json') -> List[str]:
+def clone_or_update_all(
+    repos_file: str = 'repos.json',
+    repos: Optional[List[Dict]] = None,
+    repos_dir: Path = REPOS_DIR,
+    shared_objects: Optional[Path] = None,
+    prune: bool = True
+) -> List[str]:
     """
     Clone or update all repositories from the repos list.
     
+    Clones of repositories missing from the list are removed (unless `prune`
+    is False), and every processed clone is marked as used in the clone
+    store index.
+    
+    Args:
+        repos_file: JSON file written by fetch_repos, read when `repos` is not given
+        repos: Repository dictionaries already in memory
+        repos_dir: Directory holding the local clones
+        shared_objects: Optional shared object store (see clone_store)
+        prune: Remove unlisted clones; pass False when `repos` may be a
+            partial listing
+    
     Returns:
         List of successfully processed repository names
     """
-    ensure_repos_dir()
+    ensure_repos_dir(repos_dir)
     
-    with open(repos_file, 'r') as f:
-        repos = json.load(f)
+    if repos is None:
+        with open(repos_file, 'r') as f:
+            repos = json.load(f)
+    
+    if shared_objects:
+        shared_objects = ensure_shared_store(shared_objects)
+    
+    if prune:
+        prune_unlisted(repos, repos_dir, shared_objects)
     
     successful = []
     
     for repo in repos:
-        if clone_or_update_repo(repo):
+        action = 'pull' if (Path(repos_dir) / repo['name']).exists() else 'clone'
+        with metrics.span(action, 'git', repo=repo['name']) as attrs:
+            attrs['ok'] = clone_or_update_repo(repo, repos_dir, shared_objects)
+        if attrs['ok']:
             successful.append(repo['name'])
     
+    mark_used(repos_dir, successful)
+    
     print(f"\nSuccessfully processed {len(successful)}/{len(repos)} repositories")
     return successful
 
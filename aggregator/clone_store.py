@@ -0,0 +1,292 @@
+"""
+Disk management for the local clones in aggregator/repos.
+
+Keeps an index of when each clone was last used and how big it is, removes
+clones of repositories that are no longer listed (deleted, archived or turned
+into forks upstream), and evicts the least recently used clones when the
+store grows beyond a disk budget.
+
+Clones can optionally share one bare object store through git alternates, so
+objects are kept once instead of once per clone.
+"""
+import json
+import os
+import shutil
+import stat
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+INDEX_FILE = '.store.json'
+SHARED_OBJECTS_DIR = Path(__file__).resolve().parent / 'shared-objects.git'
+
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text: Optional[str]) -> Optional[int]:
+    """Parse a size such as '500M', '2G' or '1048576' into bytes (None if empty)."""
+    if not text:
+        return None
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def format_size(num: int) -> str:
+    """Format a byte count for log output."""
+    for unit in ['B', 'K', 'M', 'G']:
+        if num < 1024:
+            return f"{num:.0f}{unit}" if unit == 'B' else f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}T"
+
+
+def dir_size(path: Path) -> int:
+    """Total size of the files under `path`, without following symlinks."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _remove_tree(path: Path):
+    """Delete a clone, including the read-only files git leaves in .git/objects."""
+    def make_writable(func, failed_path, _):
+        os.chmod(failed_path, stat.S_IWRITE)
+        func(failed_path)
+
+    shutil.rmtree(path, onerror=make_writable)
+
+
+def load_index(repos_dir: Path) -> Dict[str, Dict]:
+    """Load the clone index, keeping only entries whose clone still exists."""
+    repos_dir = Path(repos_dir)
+    try:
+        with open(repos_dir / INDEX_FILE, 'r') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+
+    # Clones made before the index existed count as used long ago
+    for path in repos_dir.iterdir() if repos_dir.exists() else []:
+        if path.is_dir() and path.name not in index:
+            index[path.name] = {'last_used': 0, 'size': None}
+
+    return {name: entry for name, entry in index.items() if (repos_dir / name).is_dir()}
+
+
+def save_index(repos_dir: Path, index: Dict[str, Dict]):
+    """Write the clone index."""
+    with open(Path(repos_dir) / INDEX_FILE, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+
+
+def mark_used(repos_dir: Path, names: Iterable[str]):
+    """Record that the given clones were used now and refresh their sizes."""
+    index = load_index(repos_dir)
+    now = time.time()
+    for name in names:
+        if (Path(repos_dir) / name).is_dir():
+            index[name] = {'last_used': now, 'size': dir_size(Path(repos_dir) / name)}
+    save_index(repos_dir, index)
+
+
+def remove_clones(repos_dir: Path, names: Iterable[str], shared_objects: Optional[Path] = None) -> List[str]:
+    """Delete clones (and their refs in the shared object store)."""
+    removed = []
+    for name in names:
+        path = Path(repos_dir) / name
+        if path.is_dir():
+            _remove_tree(path)
+            removed.append(name)
+
+    if removed and shared_objects and Path(shared_objects).exists():
+        drop_from_shared(shared_objects, removed)
+
+    index = load_index(repos_dir)
+    save_index(repos_dir, index)
+    return removed
+
+
+def prune_unlisted(repos: List[Dict], repos_dir: Path, shared_objects: Optional[Path] = None) -> List[str]:
+    """
+    Remove clones of repositories that are not in the current listing.
+
+    `repos` must be a complete listing: fetch_user_repos raises on a partial
+    one, and the caller then skips pruning. An empty listing never prunes
+    anything.
+
+    Returns:
+        Names of the removed clones
+    """
+    if not repos:
+        return []
+
+    listed = {repo['name'] for repo in repos}
+    stale = [name for name in load_index(repos_dir) if name not in listed]
+
+    removed = remove_clones(repos_dir, stale, shared_objects)
+    for name in removed:
+        print(f"Removed {name} (no longer listed)")
+    return removed
+
+
+def enforce_budget(repos_dir: Path, budget: Optional[int], shared_objects: Optional[Path] = None) -> List[str]:
+    """
+    Evict clones until the store, including the shared object store, fits in
+    `budget` bytes.
+
+    Clones are evicted least recently used first, and among clones used at the
+    same time the largest first. How much of the shared store an eviction
+    frees is only known after gc, so clones are evicted in rounds sized by an
+    estimate, and the shared store is measured again after each round.
+
+    Returns:
+        Names of the evicted clones
+    """
+    if budget is None:
+        return []
+
+    index = load_index(repos_dir)
+    for name, entry in index.items():
+        if entry.get('size') is None:
+            entry['size'] = dir_size(Path(repos_dir) / name)
+
+    def shared_size() -> int:
+        return dir_size(shared_objects) if shared_objects and Path(shared_objects).exists() else 0
+
+    candidates = sorted(index.items(), key=lambda x: (x[1]['last_used'], -x[1]['size']))
+    shared = shared_size()
+    total = sum(entry['size'] for entry in index.values()) + shared
+    print(f"Clone store: {format_size(total)} used ({format_size(shared)} shared), "
+          f"budget {format_size(budget)}")
+
+    evicted = []
+    while total > budget and candidates:
+        # Each clone is assumed to hold a share of the shared store in
+        # proportion to its own size
+        own = sum(entry['size'] for _, entry in candidates)
+        ratio = 1 + shared / own if own else 1
+        victims = []
+        excess = total - budget
+        while candidates and excess > 0:
+            name, entry = candidates.pop(0)
+            victims.append(name)
+            excess -= entry['size'] * ratio
+
+        for name in remove_clones(repos_dir, victims, shared_objects):
+            print(f"Evicted {name} ({format_size(index[name]['size'])})")
+            evicted.append(name)
+
+        shared = shared_size()
+        total = sum(entry['size'] for _, entry in candidates) + shared
+
+    if evicted:
+        print(f"Clone store: {format_size(total)} used ({format_size(shared)} shared) after eviction")
+    return evicted
+
+
+def ensure_shared_store(shared_objects: Path = SHARED_OBJECTS_DIR) -> Path:
+    """Create the bare repository that holds the shared objects."""
+    shared_objects = Path(shared_objects)
+    if not (shared_objects / 'objects').is_dir():
+        subprocess.run(
+            ['git', 'init', '--quiet', '--bare', str(shared_objects)],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    return shared_objects
+
+
+def _shared_git(shared_objects: Path, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ['git', '--git-dir', str(shared_objects), *args],
+        capture_output=True,
+        text=True,
+        **kwargs
+    )
+
+
+def _drop_refs(shared_objects: Path, name: str, keep: Iterable[str] = ()):
+    """Delete the refs of one clone in the shared store, except those in `keep`."""
+    # Older stores kept a single refs/loc/<name>, which would block refs/loc/<name>/*
+    _shared_git(shared_objects, 'update-ref', '-d', f'refs/loc/{name}')
+
+    listed = _shared_git(shared_objects, 'for-each-ref', '--format=%(refname)', f'refs/loc/{name}/')
+    stale = set(listed.stdout.split()) - set(keep)
+    if stale:
+        _shared_git(shared_objects, 'update-ref', '--stdin',
+                    input=''.join(f'delete {ref}\n' for ref in sorted(stale)))
+
+
+def fetch_into_shared(shared_objects: Path, name: str, url: str, timeout: int = 300) -> bool:
+    """
+    Fetch a repository's default branch into the shared store.
+
+    The fetch is not shallow, because git cannot use a shallow repository as
+    a reference for other clones. The fetched ref only lives until the clone
+    is pinned (see pin_clone).
+    """
+    _shared_git(shared_objects, 'update-ref', '-d', f'refs/loc/{name}')
+    result = _shared_git(shared_objects, 'fetch', '--quiet', '--no-tags',
+                         url, f'+HEAD:refs/loc/{name}/upstream', timeout=timeout)
+    if result.returncode != 0:
+        print(f"  Warning: failed to fetch {name} into the shared store")
+        print(f"  {result.stderr}")
+    return result.returncode == 0
+
+
+def pin_clone(shared_objects: Path, name: str, repo_path: Path):
+    """
+    Point the clone's refs in the shared store at exactly what the clone uses.
+
+    Every commit the clone references (HEAD and its own refs) is kept under
+    refs/loc/<name>/<sha>, and everything else under refs/loc/<name>/ is
+    dropped. The clone's reflogs are expired, since they may point at objects
+    that are no longer pinned. Together this lets drop_from_shared run
+    `gc --prune=now` without breaking a clone. Call this after every
+    clone or update, whether it succeeded or not.
+    """
+    repo_path = Path(repo_path)
+    if not (repo_path / '.git').exists():
+        _drop_refs(shared_objects, name)
+        return
+
+    commits = set()
+    for command in (['rev-parse', '--verify', '--quiet', 'HEAD'],
+                    ['for-each-ref', '--format=%(objectname)']):
+        result = subprocess.run(['git', '-C', str(repo_path), *command], capture_output=True, text=True)
+        commits.update(result.stdout.split())
+    subprocess.run(['git', '-C', str(repo_path), 'reflog', 'expire', '--expire=all', '--all'],
+                   capture_output=True, text=True)
+
+    # Commits the clone fetched itself (e.g. the shared fetch failed) are not in the store
+    known = _shared_git(shared_objects, 'cat-file', '--batch-check=%(objectname)',
+                        input=''.join(f'{sha}\n' for sha in sorted(commits)))
+    pins = {f'refs/loc/{name}/{sha}': sha
+            for sha in known.stdout.splitlines() if sha in commits}
+    _drop_refs(shared_objects, name, keep=pins)
+    if pins:
+        _shared_git(shared_objects, 'update-ref', '--stdin',
+                    input=''.join(f'update {ref} {sha}\n' for ref, sha in sorted(pins.items())))
+
+
+def drop_from_shared(shared_objects: Path, names: Iterable[str]):
+    """
+    Forget the refs of removed clones and drop the objects nothing else uses.
+
+    gc prunes unreachable objects right away rather than after its grace
+    period: every remaining clone is pinned (see pin_clone), so no clone
+    still points at them.
+    """
+    for name in names:
+        _drop_refs(shared_objects, name)
+    _shared_git(shared_objects, 'gc', '--quiet', '--prune=now')
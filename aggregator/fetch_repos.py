@@ -8,6 +8,14 @@ from typing import List, Dict
 import json
 
 
+class IncompleteListingError(RuntimeError):
+    """A page of the listing could not be fetched; `repos` holds the pages fetched before it."""
+    
+    def __init__(self, message: str, repos: List[Dict]):
+        super().__init__(message)
+        self.repos = repos
+
+
 def fetch_user_repos(username: str, token: str = None) -> List[Dict]:
     """
     Fetch all repositories for a given GitHub user.
@@ -18,6 +26,10 @@ def fetch_user_repos(username: str, token: str = None) -> List[Dict]:
     
     Returns:
         List of repository dictionaries
+    
+    Raises:
+        IncompleteListingError: if any page fails (rate limit, server error),
+            so callers never mistake a partial listing for the full one
     """
     headers = {}
     if token:
@@ -42,7 +54,9 @@ def fetch_user_repos(username: str, token: str = None) -> List[Dict]:
         if response.status_code != 200:
             print(f"Error fetching repos: {response.status_code}")
             print(response.text)
-            break
+            raise IncompleteListingError(
+                f"Page {page} of the repository listing failed with status {response.status_code}", repos
+            )
         
         page_repos = response.json()
         
@@ -78,5 +92,9 @@ if __name__ == '__main__':
         print("Please set GITHUB_USERNAME environment variable")
         exit(1)
     
-    repos = fetch_user_repos(username, token)
+    try:
+        repos = fetch_user_repos(username, token)
+    except IncompleteListingError as e:
+        print(f"{e}; repos.json left as is")
+        exit(1)
     save_repos_list(repos)
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Structured tracing and metrics for the aggregation pipeline.
+
+Spans are recorded in memory and exported as JSON lines (one record per span)
+and as a Chrome trace file that can be opened in chrome://tracing or
+https://ui.perfetto.dev.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_events: List[Dict] = []
+_lock = threading.Lock()
+
+
+def now_us() -> int:
+    """Wall-clock time in microseconds, so traces from several processes line up."""
+    return time.time_ns() // 1000
+
+
+def reset():
+    """Drop all recorded events."""
+    with _lock:
+        _events.clear()
+
+
+def add_event(
+    name: str,
+    category: str,
+    start_us: int,
+    duration_us: int,
+    thread: Optional[str] = None,
+    **fields
+):
+    """
+    Record an externally timed event (e.g. one reported by the Rust engine).
+
+    Args:
+        name: Event name
+        category: Event category (pipeline, git, engine, updater, ...)
+        start_us: Start timestamp in microseconds since the epoch
+        duration_us: Duration in microseconds
+        thread: Optional track name for the trace viewer
+        **fields: Extra attributes stored with the event
+    """
+    event = {
+        'name': name,
+        'cat': category,
+        'ts': int(start_us),
+        'dur': max(int(duration_us), 0),
+        'pid': os.getpid(),
+        'tid': thread or threading.current_thread().name,
+        'args': fields,
+    }
+    with _lock:
+        _events.append(event)
+
+
+@contextmanager
+def span(name: str, category: str = 'pipeline', **fields) -> Iterator[Dict]:
+    """
+    Time a block of code and record it as an event.
+
+    The yielded dictionary can be used to attach results to the span:
+
+        with span('clone', 'git', repo='foo') as attrs:
+            attrs['ok'] = clone()
+    """
+    attrs = dict(fields)
+    start_us = now_us()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs['error'] = str(e)
+        raise
+    finally:
+        duration_us = int((time.perf_counter() - start) * 1_000_000)
+        add_event(name, category, start_us, duration_us, **attrs)
+
+
+def get_events() -> List[Dict]:
+    """Return a copy of all recorded events."""
+    with _lock:
+        return list(_events)
+
+
+def write_metrics(output_file: str = 'metrics.jsonl', append: bool = False):
+    """Write one JSON record per event to a JSON-lines file."""
+    mode = 'a' if append else 'w'
+    with open(output_file, mode) as f:
+        for event in get_events():
+            record = {
+                'name': event['name'],
+                'category': event['cat'],
+                'start_us': event['ts'],
+                'duration_ms': round(event['dur'] / 1000, 3),
+                'pid': event['pid'],
+                'thread': event['tid'],
+            }
+            record.update(event['args'])
+            f.write(json.dumps(record) + "\n")
+
+
+def write_trace(output_file: str = 'trace.json', append: bool = False):
+    """
+    Write events in the Chrome trace event format.
+
+    Args:
+        output_file: Path of the trace file
+        append: Merge with events already present in the file instead of
+            replacing them (used by the updater, which runs in its own process)
+    """
+    trace_events = []
+    if append and Path(output_file).exists():
+        try:
+            with open(output_file, 'r') as f:
+                trace_events = json.load(f).get('traceEvents', [])
+        except (json.JSONDecodeError, AttributeError):
+            trace_events = []
+
+    for event in get_events():
+        trace_events.append({**event, 'ph': 'X'})
+
+    with open(output_file, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+
+def slowest_repos(top_n: int = 5) -> List[Tuple[str, float, Dict[str, float]]]:
+    """
+    Rank repositories by the total time spent on them across all stages.
+
+    Returns:
+        List of (repo name, total seconds, seconds per category) tuples
+    """
+    per_repo: Dict[str, Dict[str, float]] = {}
+    for event in get_events():
+        repo = event['args'].get('repo')
+        if not repo:
+            continue
+        stages = per_repo.setdefault(repo, {})
+        stages[event['cat']] = stages.get(event['cat'], 0.0) + event['dur'] / 1_000_000
+
+    ranked = sorted(per_repo.items(), key=lambda x: sum(x[1].values()), reverse=True)
+    return [(repo, sum(stages.values()), stages) for repo, stages in ranked[:top_n]]
+
+
+def print_summary(top_n: int = 5):
+    """Print stage timings and the slowest repositories."""
+    print("\nTimings:")
+    for event in get_events():
+        if event['cat'] == 'pipeline':
+            print(f"  {event['name']}: {event['dur'] / 1_000_000:.2f}s")
+
+    slow = slowest_repos(top_n)
+    if not slow:
+        return
+
+    print(f"\nTop {len(slow)} slowest repositories:")
+    for repo, total, stages in slow:
+        breakdown = ", ".join(f"{cat} {secs:.2f}s" for cat, secs in sorted(stages.items()))
+        print(f"  {repo}: {total:.2f}s ({breakdown})")
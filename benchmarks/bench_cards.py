@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the SVG card engine.
+
+Renders every combination of theme, layout, width and top-N for a sample of
+30 languages and prints, per variant, the render time and the size of the
+SVG and of its gzip/.svgz copy. It ends with the cost of rendering all
+variants one card per call versus in one render_variants pass.
+
+    python benchmarks/bench_cards.py [--repeat 200]
+"""
+import argparse
+import sys
+import timeit
+from itertools import product
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'renderer'))
+
+from card_engine import (
+    LAYOUTS, THEMES, compress, prepare, render_card, render_prepared, render_variants, resolve_variant
+)
+
+
+LANGUAGES = [
+    'Python', 'JavaScript', 'TypeScript', 'Rust', 'Go', 'Java', 'C', 'C++', 'C#', 'Ruby',
+    'PHP', 'Swift', 'Kotlin', 'Scala', 'Shell', 'HTML', 'CSS', 'SQL', 'R', 'YAML',
+    'JSON', 'XML', 'Markdown', 'Vue', 'Dart', 'Lua', 'Perl', 'Haskell', 'Elixir', 'Clojure',
+]
+SAMPLE_DATA = {lang: 250_000 // (i + 1) for i, lang in enumerate(LANGUAGES)}
+
+WIDTHS = [350, 495, 800]
+TOP_NS = [5, 10]
+
+
+def best_us(func, repeat: int) -> float:
+    """Best time per call in microseconds over 5 rounds of `repeat` calls."""
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SVG card rendering.')
+    parser.add_argument('--repeat', type=int, default=200, help='Calls per timing round')
+    args = parser.parse_args()
+
+    variants = [
+        resolve_variant({'theme': theme, 'layout': layout, 'width': width, 'top_n': top_n})
+        for theme, layout, width, top_n in product(THEMES, LAYOUTS, WIDTHS, TOP_NS)
+    ]
+    data = prepare(SAMPLE_DATA, max(TOP_NS))
+
+    print(f"{'variant':<42} {'render µs':>10} {'svg bytes':>10} {'gzip bytes':>11}")
+    for variant in variants:
+        svg = render_prepared(data, variant)
+        elapsed = best_us(lambda: render_prepared(data, variant), args.repeat)
+        print(f"{variant['name']:<42} {elapsed:>10.1f} {len(svg.encode('utf-8')):>10} {len(compress(svg)):>11}")
+
+    def one_per_call():
+        for variant in variants:
+            render_card(SAMPLE_DATA, **{k: variant[k] for k in ('theme', 'layout', 'width', 'top_n')})
+
+    def one_pass():
+        render_variants(SAMPLE_DATA, variants)
+
+    repeat = max(1, args.repeat // 20)
+    separate = best_us(one_per_call, repeat)
+    batched = best_us(one_pass, repeat)
+    print(f"\n{len(variants)} variants, one card per call: {separate / 1000:.2f} ms")
+    print(f"{len(variants)} variants, one render_variants pass: {batched / 1000:.2f} ms "
+          f"({separate / batched:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the counting engines.
+
+Generates a deterministic synthetic tree of repositories in a temporary
+directory, counts it with loc_runner (when it is built), with the
+Python engine in-process and with the Python engine's process pool, checks
+that all of them return the same `languages` map and prints, per engine,
+the best wall time, files/s and MB/s.
+
+    python benchmarks/bench_engine.py [--repos 20] [--files 500] [--repeat 3]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent / 'engine'
+sys.path.insert(0, str(ENGINE_DIR))
+
+from py_engine import count_loc
+
+
+# (relative path pattern, bytes per line); {i} is the file number
+FILE_KINDS = [
+    ('src/module_{i}.py', 'value_{n} = compute({n}) + offset\n'),
+    ('src/lib_{i}.rs', 'let value_{n} = compute({n}) + offset;\n'),
+    ('web/app_{i}.js', 'const value{n} = compute({n}) + offset;\r\n'),
+    ('web/view_{i}.tsx', 'export const Value{n} = () => <div>{n}</div>;\n'),
+    ('cmd/main_{i}.go', 'fmt.Println("value", {n})\n'),
+    ('docs/page_{i}.md', 'Paragraph {n} of the documentation.\n'),
+    ('node_modules/dep_{i}.js', 'module.exports = {n};\n'),
+    ('assets/image_{i}.png', 'binary {n}\n'),
+]
+LARGE_FILE_LINES = 40_000
+
+
+def make_tree(root: Path, repos: int, files: int, seed: int = 7) -> None:
+    """Write `repos` repositories of `files` files each under `root`."""
+    rng = random.Random(seed)
+    for r in range(repos):
+        repo = root / f'repo_{r:03d}'
+        for i in range(files):
+            pattern, line = FILE_KINDS[i % len(FILE_KINDS)]
+            path = repo / pattern.format(i=i)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lines = rng.randint(1, 400)
+            body = ''.join(line.format(n=n) for n in range(lines))
+            path.write_text(body if rng.random() > 0.1 else body.rstrip('\n'), newline='')
+        # One file per repository large enough to take the mmap path
+        (repo / 'src' / 'generated.py').write_text('x = 1\n' * LARGE_FILE_LINES)
+
+
+def run_rust(tree: Path):
+    binary = ENGINE_DIR / 'loc_runner'
+    if not binary.exists():
+        return None
+    result = subprocess.run([str(binary), str(tree)], cwd=ENGINE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"loc_runner failed, rebuild it (see setup.sh):\n{result.stderr}")
+    return json.loads(result.stdout)
+
+
+def best_of(func, repeat: int):
+    """(best wall time in seconds, result of the last call)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the counting engines.')
+    parser.add_argument('--repos', type=int, default=20, help='Repositories in the synthetic tree')
+    parser.add_argument('--files', type=int, default=500, help='Files per repository')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine (best is kept)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = Path(tmp)
+        make_tree(tree, args.repos, args.files)
+
+        _, repo_stats = count_loc(str(tree), workers=0)
+        counted = sum(repo['files_counted'] for repo in repo_stats)
+        megabytes = sum(repo['bytes_read'] for repo in repo_stats) / 1e6
+        print(f"{args.repos} repositories, {counted} counted files, {megabytes:.1f} MB\n")
+
+        engines = [
+            ('python, in-process', lambda: count_loc(str(tree), workers=0)[0]),
+            ('python, process pool', lambda: count_loc(str(tree))[0]),
+        ]
+        if run_rust(tree) is not None:
+            engines.insert(0, ('rust loc_runner', lambda: run_rust(tree)))
+        else:
+            print("loc_runner is not built, skipping it\n")
+
+        print(f"{'engine':<22} {'seconds':>8} {'files/s':>10} {'MB/s':>8}")
+        reference = None
+        for name, func in engines:
+            elapsed, result = best_of(func, args.repeat)
+            print(f"{name:<22} {elapsed:>8.3f} {counted / elapsed:>10.0f} {megabytes / elapsed:>8.1f}")
+            if reference is None:
+                reference = result
+            elif result != reference:
+                print(f"  results differ from {engines[0][0]}: {result} != {reference}")
+                sys.exit(1)
+
+        print("\nAll engines returned the same languages map")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Language registry shared by the counting engine and the renderers.
+
+languages.toml is the editable source: one entry per language with its
+extensions, file names, shebang interpreters, colour and comment syntax.
+Running this file compiles it into languages.json, which already holds the
+extension, file name and interpreter lookup tables. Both loc_runner and the
+Python modules read only the compiled file, so startup is a single JSON load
+and every lookup is a dictionary access.
+"""
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+
+ENGINE_DIR = Path(__file__).resolve().parent
+SOURCE_FILE = ENGINE_DIR / 'languages.toml'
+COMPILED_FILE = ENGINE_DIR / 'languages.json'
+
+INDEXES = {'extensions': 'extension', 'filenames': 'file name', 'interpreters': 'interpreter'}
+
+# Trailing version of an interpreter name, e.g. python3.11 -> python
+VERSION_SUFFIX_RE = re.compile(r'[\d.]+$')
+
+
+def source_digest(source_file: Path = SOURCE_FILE) -> str:
+    """Hash of the registry source, stored in the compiled file to detect stale builds."""
+    return hashlib.sha256(Path(source_file).read_bytes()).hexdigest()
+
+
+def compile_registry(source_file: Path = SOURCE_FILE, output_file: Path = COMPILED_FILE) -> Dict:
+    """
+    Compile languages.toml into languages.json.
+
+    Raises:
+        ValueError: if an extension, file name or interpreter is claimed by
+            more than one language
+    """
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    with open(source_file, 'rb') as f:
+        source = tomllib.load(f)
+
+    registry = {
+        'source_digest': source_digest(source_file),
+        'languages': {},
+        'extensions': {},
+        'filenames': {},
+        'interpreters': {},
+    }
+
+    for name, entry in source.items():
+        registry['languages'][name] = {
+            'type': entry.get('type', 'programming'),
+            'color': entry.get('color'),
+            'line_comment': entry.get('line_comment'),
+            'block_comment': entry.get('block_comment'),
+        }
+        for index, label in INDEXES.items():
+            for key in entry.get(index, []):
+                owner = registry[index].get(key)
+                if owner is not None and owner != name:
+                    raise ValueError(f"{label} '{key}' is listed for both {owner} and {name}")
+                registry[index][key] = name
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+    return registry
+
+
+@lru_cache(maxsize=None)
+def load_registry(compiled_file: Path = COMPILED_FILE) -> Dict:
+    """Load the compiled registry (once per process)."""
+    with open(compiled_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_stale(compiled_file: Path = COMPILED_FILE, source_file: Path = SOURCE_FILE) -> bool:
+    """True if languages.json was not compiled from the current languages.toml."""
+    return load_registry(compiled_file).get('source_digest') != source_digest(source_file)
+
+
+def language_info(language: str) -> Optional[Dict]:
+    """Metadata of a language (type, color, comment syntax), or None if unknown."""
+    return load_registry()['languages'].get(language)
+
+
+def language_color(language: str) -> Optional[str]:
+    """Colour of a language as 'RRGGBB' without '#', or None if it has none."""
+    info = language_info(language)
+    if info is None or not info['color']:
+        return None
+    return info['color'].lstrip('#')
+
+
+def interpreter_from_shebang(first_line: str) -> Optional[str]:
+    """
+    Interpreter named by a shebang line.
+
+    '#!/usr/bin/env python3' -> 'python3', '#!/bin/sh -e' -> 'sh',
+    '#!/usr/bin/env -S deno run' -> 'deno'.
+    """
+    if not first_line.startswith('#!'):
+        return None
+
+    words = first_line[2:].split()
+    if not words:
+        return None
+
+    program = words[0].rsplit('/', 1)[-1]
+    if program == 'env':
+        words = [word for word in words[1:] if not word.startswith('-') and '=' not in word]
+        if not words:
+            return None
+        program = words[0].rsplit('/', 1)[-1]
+    return program
+
+
+def language_for_interpreter(interpreter: str) -> Optional[str]:
+    """Language of an interpreter, trying 'python3.11' as 'python' too."""
+    interpreters = load_registry()['interpreters']
+    language = interpreters.get(interpreter)
+    if language is None:
+        language = interpreters.get(VERSION_SUFFIX_RE.sub('', interpreter))
+    return language
+
+
+def detect_language(file_name: str, first_line: Optional[str] = None) -> Optional[str]:
+    """
+    Language of a file, in the same order as loc_runner: exact file name,
+    then extension, then (for files without an extension) the shebang.
+
+    Args:
+        file_name: Base name of the file
+        first_line: First line of the file, used for extensionless scripts
+    """
+    registry = load_registry()
+
+    language = registry['filenames'].get(file_name)
+    if language is not None:
+        return language
+
+    stem, dot, ext = file_name.rpartition('.')
+    if dot and stem:
+        return registry['extensions'].get('.' + ext)
+
+    if first_line is not None:
+        interpreter = interpreter_from_shebang(first_line)
+        if interpreter is not None:
+            return language_for_interpreter(interpreter)
+    return None
+
+
+if __name__ == '__main__':
+    registry = compile_registry()
+    print(f"Compiled {len(registry['languages'])} languages "
+          f"({len(registry['extensions'])} extensions, {len(registry['filenames'])} file names, "
+          f"{len(registry['interpreters'])} interpreters) into {COMPILED_FILE}")
@@ -1,13 +1,15 @@
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
 use std::fs;
+use std::io::Read;
 use std::path::{Path, PathBuf};
+use std::time::Instant;
 use serde::{Deserialize, Serialize};
 use walkdir::WalkDir;
 
 #[derive(Debug, Deserialize)]
 struct Config {
     patterns: Patterns,
-    languages: HashMap<String, Vec<String>>,
+    counting: Counting,
 }
 
 #[derive(Debug, Deserialize)]
@@ -16,11 +18,36 @@ struct Patterns {
     ignore_files: Vec<String>,
 }
 
+#[derive(Debug, Deserialize)]
+struct Counting {
+    languages: Vec<String>,
+}
+
+/// Lookup tables of the compiled language registry (languages.json),
+/// restricted to the languages being counted.
+#[derive(Debug, Default, Deserialize)]
+struct Registry {
+    extensions: HashMap<String, String>,
+    filenames: HashMap<String, String>,
+    interpreters: HashMap<String, String>,
+}
+
 #[derive(Debug, Serialize)]
 struct LocResults {
     languages: HashMap<String, u64>,
 }
 
+/// Per-repository counters reported on stderr when `--stats` is passed.
+#[derive(Debug, Default, Serialize)]
+struct RepoStats {
+    repo: String,
+    files_walked: u64,
+    files_counted: u64,
+    bytes_read: u64,
+    start_us: u64,
+    elapsed_us: u64,
+}
+
 fn load_config() -> Result<Config, Box<dyn std::error::Error>> {
     let config_path = Path::new("ignore_rules.toml");
     let config_str = fs::read_to_string(config_path)?;
@@ -28,6 +55,23 @@ fn load_config() -> Result<Config, Box<dyn std::error::Error>> {
     Ok(config)
 }
 
+fn load_registry(counted: &[String]) -> Result<Registry, Box<dyn std::error::Error>> {
+    let registry_str = fs::read_to_string(Path::new("languages.json"))?;
+    let mut registry: Registry = serde_json::from_str(&registry_str)?;
+
+    for lang in counted {
+        if !registry.extensions.values().chain(registry.filenames.values()).any(|l| l == lang) {
+            eprintln!("Warning: language '{}' is not in languages.toml", lang);
+        }
+    }
+
+    let counted: HashSet<&str> = counted.iter().map(|l| l.as_str()).collect();
+    registry.extensions.retain(|_, lang| counted.contains(lang.as_str()));
+    registry.filenames.retain(|_, lang| counted.contains(lang.as_str()));
+    registry.interpreters.retain(|_, lang| counted.contains(lang.as_str()));
+    Ok(registry)
+}
+
 fn should_ignore_dir(dir_name: &str, ignore_patterns: &[String]) -> bool {
     ignore_patterns.iter().any(|pattern| dir_name == pattern)
 }
@@ -44,27 +88,58 @@ fn should_ignore_file(file_name: &str, ignore_patterns: &[String]) -> bool {
     })
 }
 
-fn get_language_for_extension(
-    ext: &str,
-    languages: &HashMap<String, Vec<String>>,
-) -> Option<String> {
-    for (lang, extensions) in languages {
-        if extensions.iter().any(|e| e == ext) {
-            return Some(lang.clone());
-        }
+/// Interpreter named by a shebang line, e.g. "#!/usr/bin/env python3" -> "python3".
+fn interpreter_from_shebang(line: &str) -> Option<String> {
+    let mut words = line.strip_prefix("#!")?.split_whitespace();
+    let mut program = words.next()?.rsplit('/').next()?;
+    if program == "env" {
+        program = words.find(|w| !w.starts_with('-') && !w.contains('='))?;
+        program = program.rsplit('/').next()?;
     }
-    None
+    Some(program.to_string())
 }
 
-fn count_lines_in_file(path: &Path) -> Result<u64, std::io::Error> {
+fn read_first_line(path: &Path) -> Option<String> {
+    let mut buf = [0u8; 256];
+    let n = fs::File::open(path).ok()?.read(&mut buf).ok()?;
+    let head = String::from_utf8_lossy(&buf[..n]);
+    head.lines().next().map(|l| l.to_string())
+}
+
+/// Language of a file: exact file name, then extension, then (for files
+/// without an extension) the shebang interpreter.
+fn detect_language(path: &Path, file_name: &str, registry: &Registry) -> Option<String> {
+    if let Some(lang) = registry.filenames.get(file_name) {
+        return Some(lang.clone());
+    }
+
+    if let Some(ext) = path.extension() {
+        let extension = format!(".{}", ext.to_string_lossy());
+        return registry.extensions.get(&extension).cloned();
+    }
+
+    if registry.interpreters.is_empty() {
+        return None;
+    }
+    let interpreter = interpreter_from_shebang(&read_first_line(path)?)?;
+    registry
+        .interpreters
+        .get(&interpreter)
+        .or_else(|| registry.interpreters.get(interpreter.trim_end_matches(|c: char| c.is_ascii_digit() || c == '.')))
+        .cloned()
+}
+
+fn count_lines_in_file(path: &Path) -> Result<(u64, u64), std::io::Error> {
     let content = fs::read_to_string(path)?;
     let line_count = content.lines().count() as u64;
-    Ok(line_count)
+    Ok((line_count, content.len() as u64))
 }
 
 fn count_loc_in_directory(
     dir: &Path,
     config: &Config,
+    registry: &Registry,
+    stats: &mut RepoStats,
 ) -> HashMap<String, u64> {
     let mut results: HashMap<String, u64> = HashMap::new();
 
@@ -88,6 +163,8 @@ fn count_loc_in_directory(
             continue;
         }
 
+        stats.files_walked += 1;
+
         let file_name = entry.file_name().to_string_lossy();
         
         // Check if file should be ignored
@@ -95,21 +172,17 @@ fn count_loc_in_directory(
             continue;
         }
 
-        // Get file extension
-        let extension = match entry.path().extension() {
-            Some(ext) => format!(".{}", ext.to_string_lossy()),
-            None => continue,
-        };
-
         // Determine language
-        let language = match get_language_for_extension(&extension, &config.languages) {
+        let language = match detect_language(entry.path(), &file_name, registry) {
             Some(lang) => lang,
             None => continue,
         };
 
         // Count lines
         match count_lines_in_file(entry.path()) {
-            Ok(lines) => {
+            Ok((lines, bytes)) => {
+                stats.files_counted += 1;
+                stats.bytes_read += bytes;
                 *results.entry(language).or_insert(0) += lines;
             }
             Err(_) => continue,
@@ -123,11 +196,13 @@ fn main() {
     let args: Vec<String> = std::env::args().collect();
     
     if args.len() < 2 {
-        eprintln!("Usage: {} <directory>", args[0]);
+        eprintln!("Usage: {} <directory> [--stats]", args[0]);
         std::process::exit(1);
     }
 
     let target_dir = Path::new(&args[1]);
+    let report_stats = args[2..].iter().any(|a| a == "--stats");
+    let started = Instant::now();
     
     if !target_dir.exists() {
         eprintln!("Directory does not exist: {}", target_dir.display());
@@ -142,6 +217,14 @@ fn main() {
         }
     };
 
+    let registry = match load_registry(&config.counting.languages) {
+        Ok(r) => r,
+        Err(e) => {
+            eprintln!("Error loading language registry: {}", e);
+            std::process::exit(1);
+        }
+    };
+
     let mut total_results: HashMap<String, u64> = HashMap::new();
 
     // If the target is a directory containing multiple repos
@@ -150,8 +233,20 @@ fn main() {
         let path = entry.path();
         
         if path.is_dir() {
-            let repo_results = count_loc_in_directory(&path, &config);
-            
+            let mut stats = RepoStats {
+                repo: entry.file_name().to_string_lossy().into_owned(),
+                start_us: started.elapsed().as_micros() as u64,
+                ..Default::default()
+            };
+            let repo_started = Instant::now();
+            let repo_results = count_loc_in_directory(&path, &config, &registry, &mut stats);
+            stats.elapsed_us = repo_started.elapsed().as_micros() as u64;
+
+            // One JSON object per line on stderr, so stdout stays the results map
+            if report_stats {
+                eprintln!("{}", serde_json::to_string(&stats).unwrap());
+            }
+
             for (lang, count) in repo_results {
                 *total_results.entry(lang).or_insert(0) += count;
             }
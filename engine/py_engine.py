@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Pure-Python counting engine, used when the Rust loc_runner is not available.
+
+It reads the same ignore_rules.toml and languages.json and follows
+loc_runner's rules, so both produce the same `languages` map:
+
+- directories named in ignore_dirs are skipped, symlinks are not followed
+  (except for the top-level repository directories)
+- a file's language comes from its exact name, then its extension, then
+  (for extensionless files) its shebang, among the counted languages only
+- a file counts as many lines as Rust's str::lines() yields, and files that
+  cannot be read or are not valid UTF-8 are skipped
+
+Files are walked in the main process and counted in a process pool, in
+batches per repository. Newlines are counted in bulk with bytes.count(),
+over an mmap of the file for large files.
+
+Usage mirrors loc_runner:
+
+    python py_engine.py <directory> [--stats] [--workers N]
+"""
+import argparse
+import codecs
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from language_registry import VERSION_SUFFIX_RE, interpreter_from_shebang, load_registry
+
+
+ENGINE_DIR = Path(__file__).resolve().parent
+CONFIG_FILE = ENGINE_DIR / 'ignore_rules.toml'
+
+# Files at least this large are mapped instead of read
+MMAP_THRESHOLD = 256 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Files per task sent to a worker
+BATCH_SIZE = 256
+SHEBANG_BYTES = 256
+
+
+def load_config(config_file: Path = CONFIG_FILE) -> Dict:
+    """Load ignore_rules.toml."""
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    with open(config_file, 'rb') as f:
+        return tomllib.load(f)
+
+
+def build_index(config: Dict) -> Dict[str, Dict[str, str]]:
+    """Registry lookup tables restricted to the languages being counted."""
+    registry = load_registry()
+    counted = set(config['counting']['languages'])
+
+    for lang in config['counting']['languages']:
+        if lang not in registry['languages']:
+            print(f"Warning: language '{lang}' is not in languages.toml", file=sys.stderr)
+
+    return {
+        table: {key: lang for key, lang in registry[table].items() if lang in counted}
+        for table in ('extensions', 'filenames', 'interpreters')
+    }
+
+
+def should_ignore_file(file_name: str, ignore_patterns: List[str]) -> bool:
+    """Same matching as loc_runner: '*suffix' patterns match the end, others the whole name."""
+    for pattern in ignore_patterns:
+        if '*' in pattern:
+            if file_name.endswith(pattern.lstrip('*')):
+                return True
+        elif file_name == pattern:
+            return True
+    return False
+
+
+def read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(SHEBANG_BYTES)
+    except OSError:
+        return None
+    if not head:
+        return None
+    line = head.decode('utf-8', 'replace').split('\n', 1)[0]
+    return line[:-1] if line.endswith('\r') else line
+
+
+def detect_language(path: str, file_name: str, index: Dict[str, Dict[str, str]]) -> Optional[str]:
+    """Language of a file: exact name, then extension, then the shebang of extensionless files."""
+    language = index['filenames'].get(file_name)
+    if language is not None:
+        return language
+
+    stem, dot, ext = file_name.rpartition('.')
+    if dot and stem:
+        return index['extensions'].get('.' + ext)
+
+    if not index['interpreters']:
+        return None
+    first_line = read_first_line(path)
+    interpreter = interpreter_from_shebang(first_line) if first_line else None
+    if interpreter is None:
+        return None
+    interpreters = index['interpreters']
+    return interpreters.get(interpreter) or interpreters.get(VERSION_SUFFIX_RE.sub('', interpreter))
+
+
+def walk_repo(repo_dir: str, config: Dict, index: Dict) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    List the files of one repository that will be counted.
+
+    Returns:
+        (list of (path, language), number of regular files walked)
+    """
+    ignore_dirs = set(config['patterns']['ignore_dirs'])
+    ignore_files = config['patterns']['ignore_files']
+
+    if os.path.basename(os.path.normpath(repo_dir)) in ignore_dirs:
+        return [], 0
+
+    files = []
+    walked = 0
+    stack = [repo_dir]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ignore_dirs:
+                            stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+
+                walked += 1
+                if should_ignore_file(entry.name, ignore_files):
+                    continue
+                language = detect_language(entry.path, entry.name, index)
+                if language is not None:
+                    files.append((entry.path, language))
+
+    return files, walked
+
+
+def _is_utf8(data: bytes) -> bool:
+    if data.isascii():
+        return True
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def count_lines(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Count the lines of a file the way Rust's str::lines() does: one per
+    newline, plus one for a final line without a newline.
+
+    Returns:
+        (lines, bytes), or None if the file cannot be read or is not UTF-8
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                data = f.read()
+                if not _is_utf8(data):
+                    return None
+                size = len(data)
+                newlines = data.count(b'\n')
+                last = data[-1:]
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                    pending = False
+                    newlines = 0
+                    for start in range(0, size, CHUNK_SIZE):
+                        chunk = mm[start:start + CHUNK_SIZE]
+                        # ASCII chunks need no decoding unless a character spans the boundary
+                        if pending or not chunk.isascii():
+                            decoder.decode(chunk)
+                            pending = bool(decoder.getstate()[0])
+                        newlines += chunk.count(b'\n')
+                    decoder.decode(b'', final=True)
+                    last = mm[size - 1:size]
+    except (OSError, ValueError, UnicodeDecodeError):
+        return None
+
+    if size == 0:
+        return 0, 0
+    return newlines + (last != b'\n'), size
+
+
+def count_batch(batch: List[Tuple[str, str]]) -> Tuple[Dict[str, int], int, int, int, int]:
+    """
+    Count a batch of files (run in a worker process).
+
+    Returns:
+        (lines per language, files counted, bytes read, start µs, end µs)
+    """
+    start_us = time.time_ns() // 1000
+    results: Dict[str, int] = {}
+    counted = 0
+    total_bytes = 0
+
+    for path, language in batch:
+        counts = count_lines(path)
+        if counts is None:
+            continue
+        lines, size = counts
+        results[language] = results.get(language, 0) + lines
+        counted += 1
+        total_bytes += size
+
+    return results, counted, total_bytes, start_us, time.time_ns() // 1000
+
+
+def count_loc(
+    target_dir: str,
+    workers: Optional[int] = None,
+    config_file: Path = CONFIG_FILE
+) -> Tuple[Dict[str, int], List[Dict]]:
+    """
+    Count every repository directory inside `target_dir`.
+
+    Args:
+        target_dir: Directory holding one directory per repository
+        workers: Size of the process pool (default: CPU count); 0 counts in-process
+
+    Returns:
+        (lines per language, per-repository stats in loc_runner's --stats format)
+    """
+    config = load_config(config_file)
+    index = build_index(config)
+    started_us = time.time_ns() // 1000
+
+    repos = sorted((entry.name, entry.path) for entry in os.scandir(target_dir) if entry.is_dir())
+
+    tasks = []
+    stats = {}
+    for name, path in repos:
+        files, walked = walk_repo(path, config, index)
+        stats[name] = {'repo': name, 'files_walked': walked, 'files_counted': 0, 'bytes_read': 0,
+                       'start_us': None, 'elapsed_us': 0, '_end_us': 0}
+        for i in range(0, len(files), BATCH_SIZE):
+            tasks.append((name, files[i:i + BATCH_SIZE]))
+
+    if workers == 0 or len(tasks) <= 1:
+        outputs = [count_batch(batch) for _, batch in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(count_batch, [batch for _, batch in tasks]))
+
+    totals: Dict[str, int] = {}
+    for (name, _), (results, counted, size, start_us, end_us) in zip(tasks, outputs):
+        for language, lines in results.items():
+            totals[language] = totals.get(language, 0) + lines
+        repo = stats[name]
+        repo['files_counted'] += counted
+        repo['bytes_read'] += size
+        repo['start_us'] = start_us if repo['start_us'] is None else min(repo['start_us'], start_us)
+        repo['_end_us'] = max(repo['_end_us'], end_us)
+
+    repo_stats = []
+    for repo in stats.values():
+        start_us = repo['start_us'] if repo['start_us'] is not None else started_us
+        repo['elapsed_us'] = max(0, repo.pop('_end_us') - start_us)
+        repo['start_us'] = start_us - started_us
+        repo_stats.append(repo)
+
+    return totals, repo_stats
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Count lines of code (Python engine).')
+    parser.add_argument('directory', help='Directory holding one directory per repository')
+    parser.add_argument('--stats', action='store_true', help='Print per-repository stats on stderr')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Directory does not exist: {args.directory}", file=sys.stderr)
+        return 1
+
+    totals, repo_stats = count_loc(args.directory, args.workers)
+
+    # One JSON object per line on stderr, so stdout stays the results map
+    if args.stats:
+        for repo in repo_stats:
+            print(json.dumps(repo), file=sys.stderr)
+
+    print(json.dumps(totals))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Build helpers for the Rust loc_runner binary.
+
+The binary is not part of the repository: it is built with cargo into
+target/release and copied to engine/loc_runner, where the pipeline runs it.
+It is rebuilt when its sources are newer than the binary; the config and
+language registry it reads at runtime do not count as sources.
+
+    python rust_build.py    build loc_runner if it is missing or stale
+"""
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+
+ENGINE_DIR = Path(__file__).resolve().parent
+BINARY = ENGINE_DIR / 'loc_runner'
+BUILD_INPUTS = ('loc_runner.rs', 'Cargo.toml')
+
+# cargo errors meaning the crates could not be downloaded (e.g. offline)
+FETCH_ERRORS = (
+    'as a dependency of package',
+    'failed to download',
+    'failed to load source for dependency',
+    'Could not resolve host',
+)
+
+
+def have_cargo() -> bool:
+    return shutil.which('cargo') is not None
+
+
+def is_stale() -> bool:
+    """True if the binary is missing or older than any of its build inputs."""
+    if not BINARY.exists():
+        return True
+    built = BINARY.stat().st_mtime
+    return any((ENGINE_DIR / name).stat().st_mtime > built for name in BUILD_INPUTS)
+
+
+def build() -> subprocess.CompletedProcess:
+    """Run `cargo build --release` and, if it succeeds, copy the binary to engine/loc_runner."""
+    result = subprocess.run(
+        ['cargo', 'build', '--release'],
+        cwd=ENGINE_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode == 0:
+        shutil.copy2(ENGINE_DIR / 'target' / 'release' / 'loc_runner', BINARY)
+    return result
+
+
+def is_fetch_error(stderr: str) -> bool:
+    """True if a failed build only failed because its dependencies could not be fetched."""
+    return any(marker in stderr for marker in FETCH_ERRORS)
+
+
+if __name__ == '__main__':
+    if not is_stale():
+        print(f"{BINARY} is up to date")
+        sys.exit(0)
+    if not have_cargo():
+        sys.exit("cargo not found, install Rust from https://rustup.rs/")
+    result = build()
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    print(f"Built {BINARY}")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Single-process command line interface for the whole pipeline.
+
+    loc-counter fetch     Fetch the repository list from the GitHub API
+    loc-counter clone     Clone or update the repositories
+    loc-counter count     Count lines of code with the engine
+    loc-counter render    Update the README(s), cache and SVG card
+    loc-counter all       Run every stage above in one process
+    loc-counter serve     Serve the card, badges and stats over HTTP
+
+Stages hand their results to the next one in memory. When a stage is run on
+its own, it loads its input from the files the previous stage wrote
+(repos.json, loc_results.json). All paths are resolved relative to this file,
+so the CLI can be started from any directory.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+
+ROOT = Path(__file__).resolve().parent
+AGGREGATOR_DIR = ROOT / 'aggregator'
+RENDERER_DIR = ROOT / 'renderer'
+UPDATER_DIR = ROOT / 'updater'
+
+REPOS_FILE = AGGREGATOR_DIR / 'repos.json'
+RESULTS_FILE = AGGREGATOR_DIR / 'loc_results.json'
+METRICS_FILE = AGGREGATOR_DIR / 'metrics.jsonl'
+TRACE_FILE = AGGREGATOR_DIR / 'trace.json'
+
+STAGES = ['fetch', 'clone', 'count', 'render']
+
+
+def _use(directory: Path):
+    """Make the flat modules of a project directory importable."""
+    path = str(directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _metrics():
+    _use(AGGREGATOR_DIR)
+    import metrics
+    return metrics
+
+
+def fetch(state: Dict, args: argparse.Namespace):
+    """
+    Fetch the repository list and keep it in `state['repos']`.
+
+    A partial listing (a page failed) is kept for this run only: repos.json
+    is not overwritten and the clone stage does not prune.
+    """
+    _use(AGGREGATOR_DIR)
+    from fetch_repos import IncompleteListingError, fetch_user_repos, save_repos_list
+
+    if not args.username:
+        raise SystemExit("Please set GITHUB_USERNAME or pass --username")
+
+    try:
+        state['repos'] = fetch_user_repos(args.username, args.token)
+    except IncompleteListingError as e:
+        print(f"Warning: {e}; continuing with {len(e.repos)} repositories, "
+              f"without pruning clones or updating {REPOS_FILE.name}")
+        state['repos'] = e.repos
+        state['listing_complete'] = False
+        return
+
+    state['listing_complete'] = True
+    save_repos_list(state['repos'], str(REPOS_FILE))
+
+
+def clone(state: Dict, args: argparse.Namespace):
+    """Clone or update every repository in `state['repos']`."""
+    _use(AGGREGATOR_DIR)
+    from clone_or_fetch import clone_or_update_all
+
+    repos = state.get('repos')
+    if repos is None:
+        with open(REPOS_FILE, 'r') as f:
+            repos = state['repos'] = json.load(f)
+
+    state['successful_repos'] = clone_or_update_all(
+        repos=repos,
+        repos_dir=args.repos_dir,
+        shared_objects=args.shared_objects_dir if args.shared_objects else None,
+        prune=state.get('listing_complete', True)
+    )
+
+
+def count(state: Dict, args: argparse.Namespace):
+    """Count lines of code and keep the results in `state['results']`."""
+    _use(AGGREGATOR_DIR)
+    from aggregate import run_loc_counter
+    from clone_store import enforce_budget, parse_size
+
+    loc_data = run_loc_counter(args.repos_dir, args.engine)
+
+    # Clones are only evicted once they have been counted
+    enforce_budget(args.repos_dir, parse_size(args.disk_budget),
+                   args.shared_objects_dir if args.shared_objects else None)
+
+    repos = state.get('repos')
+    if repos is None and REPOS_FILE.exists():
+        with open(REPOS_FILE, 'r') as f:
+            repos = json.load(f)
+    repos = repos or []
+    successful = state.get('successful_repos', [r['name'] for r in repos])
+
+    state['results'] = {
+        'username': args.username,
+        'total_repos': len(repos),
+        'processed_repos': len(successful),
+        'languages': loc_data
+    }
+
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump(state['results'], f, indent=2)
+    print(f"Results saved to {RESULTS_FILE}")
+
+    print("\nTop 8 languages by LOC:")
+    for lang, lines in sorted(loc_data.items(), key=lambda x: x[1], reverse=True)[:8]:
+        print(f"  {lang}: {lines:,} lines")
+
+
+def render(state: Dict, args: argparse.Namespace):
+    """Update the README(s), the cache and the SVG card."""
+    _use(RENDERER_DIR)
+    _use(UPDATER_DIR)
+    from update_readme import (
+        update_cache, update_targets, load_targets, generate_svg, report_skipped,
+        load_card_variants, parse_formats
+    )
+    from render_cache import load_cache
+    from badge_svg import save_badges
+
+    results = state.get('results')
+    if results is None:
+        with open(RESULTS_FILE, 'r') as f:
+            results = state['results'] = json.load(f)
+    loc_data = results['languages']
+    username = args.username or results.get('username') or 'User'
+
+    cache_file = str(UPDATER_DIR / 'cache.json')
+    cache = load_cache(cache_file)
+    skipped = []
+
+    targets = [
+        {'path': readme, 'section_type': args.section_type, 'top_n': args.top_n}
+        for readme in filter(None, [args.readme, args.profile_readme])
+    ]
+    if args.targets:
+        targets.extend(load_targets(args.targets))
+
+    if args.badge_base:
+        top_n = max(target.get('top_n', 8) for target in targets) if targets else args.top_n
+        save_badges(loc_data, str(args.badge_dir), top_n, args.badge_style)
+
+    if not update_targets(targets, loc_data, cache, skipped, args.badge_base):
+        print("✗ Failed to update some READMEs")
+
+    if args.svg:
+        generate_svg(loc_data, username, str(UPDATER_DIR), cache=cache, skipped=skipped,
+                     variants=load_card_variants(args.cards), formats=parse_formats(args.compress_svg))
+
+    update_cache(results, cache_file, cache.get('renders', {}))
+    report_skipped(skipped)
+
+
+def serve(args: argparse.Namespace):
+    """Run the statistics HTTP server until interrupted."""
+    _use(ROOT / 'server')
+    from stats_server import serve as run_server
+
+    run_server(args.host, args.port, RESULTS_FILE, args.repos_dir, args.engine,
+               args.shared_objects_dir if args.shared_objects else None)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser; defaults come from the usual environment variables."""
+    parser = argparse.ArgumentParser(
+        prog='loc-counter',
+        description='Count lines of code across your GitHub repositories.'
+    )
+    parser.add_argument('command', choices=STAGES + ['all', 'serve'], help='Stage to run')
+    parser.add_argument('--username', default=os.environ.get('GITHUB_USERNAME'),
+                        help='GitHub username (default: $GITHUB_USERNAME)')
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'),
+                        help='GitHub token (default: $GITHUB_TOKEN)')
+    parser.add_argument('--repos-dir', type=Path, default=AGGREGATOR_DIR / 'repos',
+                        help='Directory holding the local clones')
+    parser.add_argument('--disk-budget', default=os.environ.get('CLONE_STORE_BUDGET'),
+                        help='Evict clones after counting until they fit, e.g. 2G '
+                             '(default: $CLONE_STORE_BUDGET; unlimited when unset)')
+    parser.add_argument('--engine', choices=['auto', 'rust', 'python'],
+                        default=os.environ.get('LOC_ENGINE', 'auto'),
+                        help='Counting engine; auto uses the Rust binary and falls back to the '
+                             'Python engine without a Rust toolchain (default: $LOC_ENGINE or auto)')
+    parser.add_argument('--shared-objects', action='store_true',
+                        default=os.environ.get('SHARED_OBJECTS', 'false').lower() == 'true',
+                        help='Share git objects between clones through one bare store')
+    parser.add_argument('--shared-objects-dir', type=Path, default=AGGREGATOR_DIR / 'shared-objects.git',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--readme', default=os.environ.get('README_PATH', str(ROOT / 'README.md')),
+                        help='README to update (default: $README_PATH or README.md)')
+    parser.add_argument('--profile-readme', default=os.environ.get('PROFILE_README_PATH'),
+                        help='Additional profile README to update')
+    parser.add_argument('--targets', default=os.environ.get('README_TARGETS'),
+                        help='JSON file listing more README targets (default: $README_TARGETS)')
+    parser.add_argument('--section-type', choices=['compact', 'full', 'table', 'badges'],
+                        default=os.environ.get('SECTION_TYPE', 'compact'))
+    parser.add_argument('--top-n', type=int, default=8,
+                        help='Number of languages to show (default: 8)')
+    parser.add_argument('--badge-base', default=os.environ.get('BADGE_BASE_URL'),
+                        help='Render badges locally and link them from this path or URL '
+                             '(default: $BADGE_BASE_URL; shields.io when unset)')
+    parser.add_argument('--badge-dir', type=Path, default=Path(os.environ.get('BADGE_DIR', UPDATER_DIR / 'badges')),
+                        help='Directory the local badges are written to')
+    parser.add_argument('--badge-style', choices=['flat', 'flat-square'],
+                        default=os.environ.get('BADGE_STYLE', 'flat-square'))
+    parser.add_argument('--no-svg', dest='svg', action='store_false',
+                        default=os.environ.get('GENERATE_SVG', 'true').lower() == 'true',
+                        help='Do not generate the SVG card')
+    parser.add_argument('--cards', default=os.environ.get('CARD_VARIANTS'),
+                        help='JSON file listing the card variants to render (default: $CARD_VARIANTS; '
+                             'one light card when unset)')
+    parser.add_argument('--compress-svg', default=os.environ.get('COMPRESS_SVG'),
+                        help='Also write compressed cards: svgz, gz or svgz,gz (default: $COMPRESS_SVG)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to serve on (serve only)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to serve on (serve only)')
+    return parser
+
+
+def run_stages(stages: List[str], args: argparse.Namespace) -> Dict:
+    """
+    Run pipeline stages in order in this process, then write the metrics and trace.
+
+    Returns:
+        The state handed from stage to stage (repos, successful_repos, results)
+    """
+    metrics = _metrics()
+    handlers = {'fetch': fetch, 'clone': clone, 'count': count, 'render': render}
+
+    print("=== GitHub LOC Counter ===")
+    state: Dict = {}
+    metrics.reset()
+
+    with metrics.span(f"loc-counter {' '.join(stages)}", username=args.username):
+        for i, stage in enumerate(stages, 1):
+            print(f"\nStep {i}/{len(stages)}: {stage}")
+            with metrics.span(stage):
+                handlers[stage](state, args)
+
+    metrics.write_metrics(str(METRICS_FILE))
+    metrics.write_trace(str(TRACE_FILE))
+    metrics.print_summary()
+    return state
+
+
+def main(argv: List[str] = None) -> int:
+    """Entry point of the `loc-counter` command."""
+    # The stages are flat modules in the project directories, which a regular
+    # (non-editable) install does not copy next to this file
+    if not AGGREGATOR_DIR.is_dir():
+        raise SystemExit(f"loc-counter cannot find {AGGREGATOR_DIR}. Install it from a checkout "
+                         f"with `pip install -e .`, or run `python loc_counter.py` in the checkout.")
+
+    args = build_parser().parse_args(argv)
+    if args.command == 'serve':
+        serve(args)
+        return 0
+
+    run_stages(STAGES if args.command == 'all' else [args.command], args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
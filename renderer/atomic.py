@@ -0,0 +1,48 @@
+"""
+Atomic file writes for rendered outputs.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+
+def atomic_write(path: Union[str, Path], content: Union[str, bytes]):
+    """
+    Write a file atomically: the content goes to a temporary file in the same
+    directory which is then renamed over the target, so readers never see a
+    partially written file.
+    """
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent or '.', prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path: Union[str, Path], content: Union[str, bytes]) -> bool:
+    """
+    Atomically write `content` unless the file already holds exactly that.
+    
+    Returns:
+        True if the file was written, False if it was left untouched
+    """
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    
+    if path.exists() and path.read_bytes() == data:
+        return False
+    
+    atomic_write(path, data)
+    return True
@@ -2,9 +2,19 @@
 Generate badge URLs for displaying language statistics.
 Uses shields.io for badge generation.
 """
+import sys
+from pathlib import Path
 from urllib.parse import quote
 from typing import Dict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'engine'))
+
+from language_registry import language_color
+
+
+# Colour of languages that have none in languages.toml
+DEFAULT_COLOR = '555555'
+
 
 def format_number(num: int) -> str:
     """Format large numbers with K/M suffixes."""
@@ -17,28 +27,8 @@ def format_number(num: int) -> str:
 
 
 def get_language_color(language: str) -> str:
-    """Get the standard color for a programming language."""
-    colors = {
-        'Python': '3776AB',
-        'JavaScript': 'F7DF1E',
-        'TypeScript': '3178C6',
-        'Rust': 'DEA584',
-        'Go': '00ADD8',
-        'Java': 'B07219',
-        'C': 'A8B9CC',
-        'C++': 'F34B7D',
-        'C#': '239120',
-        'Ruby': 'CC342D',
-        'PHP': '777BB4',
-        'Swift': 'F05138',
-        'Kotlin': 'A97BFF',
-        'Shell': '89E051',
-        'HTML': 'E34C26',
-        'CSS': '563D7C',
-        'Vue': '4FC08D',
-        'Dart': '00B4AB',
-    }
-    return colors.get(language, '555555')
+    """Get the standard color for a language from the shared language registry."""
+    return language_color(language) or DEFAULT_COLOR
 
 
 def generate_badge_url(language: str, lines: int, style: str = 'flat-square') -> str:
@@ -0,0 +1,202 @@
+"""
+Render language badges as standalone SVG, without shields.io.
+
+Produces the same flat and flat-square styles as shields.io. Text widths
+come from a precomputed advance-width table for Verdana (the badge font), so
+no font needs to be loaded or rasterised.
+"""
+import base64
+import re
+from pathlib import Path
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+from atomic import write_if_changed
+from badge import format_number, get_language_color
+
+
+# Verdana advance widths for the printable ASCII range (space to '~'),
+# in font units (2048 units per em).
+VERDANA_ADVANCES = (
+    720, 824, 942, 1716, 1303, 2222, 1493, 551, 927, 927, 1303, 1716, 745, 927, 745, 927,    # space to /
+    1303, 1303, 1303, 1303, 1303, 1303, 1303, 1303, 1303, 1303,                              # 0 to 9
+    927, 927, 1716, 1716, 1716, 1114, 2048,                                                  # : to @
+    1401, 1405, 1430, 1577, 1294, 1178, 1587, 1540, 862, 952, 1423, 1163, 1732,             # A to M
+    1532, 1612, 1243, 1612, 1430, 1401, 1276, 1524, 1401, 2025, 1403, 1276, 1403,           # N to Z
+    927, 927, 927, 1716, 1303, 1303,                                                         # [ to `
+    1230, 1276, 1067, 1276, 1219, 720, 1276, 1296, 562, 705, 1208, 562, 1992,               # a to m
+    1296, 1243, 1276, 1276, 874, 1067, 807, 1296, 1208, 1665, 1208, 1208, 1051,             # n to z
+    1300, 927, 1300, 1716,                                                                   # { to ~
+)
+
+UNITS_PER_EM = 2048
+FONT_SIZE = 11
+FONT_FAMILY = 'Verdana,Geneva,DejaVu Sans,sans-serif'
+
+# Pixel widths at the badge font size, indexed by code point
+CHAR_WIDTHS = [adv * FONT_SIZE / UNITS_PER_EM for adv in VERDANA_ADVANCES]
+FIRST_CHAR = 32
+# Characters outside the table are assumed to be as wide as 'm'
+FALLBACK_WIDTH = CHAR_WIDTHS[ord('m') - FIRST_CHAR]
+
+HORIZONTAL_PADDING = 5
+LABEL_COLOR = '555'
+STYLES = ('flat', 'flat-square')
+
+
+def text_width(text: str) -> int:
+    """Width of `text` in pixels, rounded up to an odd number so it centres cleanly."""
+    width = 0.0
+    for char in text:
+        index = ord(char) - FIRST_CHAR
+        width += CHAR_WIDTHS[index] if 0 <= index < len(CHAR_WIDTHS) else FALLBACK_WIDTH
+
+    width = int(-(-width // 1))
+    return width if width % 2 else width + 1
+
+
+def _is_light(color: str) -> bool:
+    """True if dark text is easier to read than white text on `color`."""
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return (r * 299 + g * 587 + b * 114) / 255000 > 0.69
+
+
+def _text(x: float, text: str, width: int, color: str, shadow: bool) -> str:
+    """Text element (and optional drop shadow) in the badge's 10x coordinate space."""
+    text = escape(text)
+    out = ''
+    if shadow:
+        shadow_color = '#ccc' if color == '#333' else '#010101'
+        out += (f'<text aria-hidden="true" x="{x * 10:g}" y="150" fill="{shadow_color}" '
+                f'fill-opacity=".3" transform="scale(.1)" textLength="{width * 10}">{text}</text>')
+    out += (f'<text x="{x * 10:g}" y="140" transform="scale(.1)" fill="{color}" '
+            f'textLength="{width * 10}">{text}</text>')
+    return out
+
+
+def render_badge(label: str, message: str, color: str, style: str = 'flat-square') -> str:
+    """
+    Render a two-part badge as SVG.
+
+    Args:
+        label: Left-hand text
+        message: Right-hand text
+        color: Hex colour of the message part, without '#'
+        style: 'flat' or 'flat-square'
+
+    Returns:
+        SVG document as a string
+    """
+    if style not in STYLES:
+        raise ValueError(f"Unsupported badge style '{style}', expected one of {STYLES}")
+
+    color = color.lstrip('#')
+    if len(color) == 3:
+        color = ''.join(c * 2 for c in color)
+
+    label_text_width = text_width(label)
+    message_text_width = text_width(message)
+    label_width = label_text_width + 2 * HORIZONTAL_PADDING
+    message_width = message_text_width + 2 * HORIZONTAL_PADDING
+    width = label_width + message_width
+
+    flat = style == 'flat'
+    message_text_color = '#333' if _is_light(color) else '#fff'
+    title = escape(f"{label}: {message}")
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="20" '
+        f'role="img" aria-label="{title}"><title>{title}</title>'
+    ]
+    if flat:
+        parts.append(
+            '<linearGradient id="s" x2="0" y2="100%"><stop offset="0" stop-color="#bbb" '
+            'stop-opacity=".1"/><stop offset="1" stop-opacity=".1"/></linearGradient>'
+            f'<clipPath id="r"><rect width="{width}" height="20" rx="3" fill="#fff"/></clipPath>'
+            '<g clip-path="url(#r)">'
+        )
+    else:
+        parts.append('<g shape-rendering="crispEdges">')
+
+    parts.append(
+        f'<rect width="{label_width}" height="20" fill="#{LABEL_COLOR}"/>'
+        f'<rect x="{label_width}" width="{message_width}" height="20" fill="#{color}"/>'
+    )
+    if flat:
+        parts.append(f'<rect width="{width}" height="20" fill="url(#s)"/>')
+    parts.append('</g>')
+
+    parts.append(
+        f'<g fill="#fff" text-anchor="middle" font-family="{FONT_FAMILY}" '
+        f'text-rendering="geometricPrecision" font-size="110">'
+    )
+    parts.append(_text(label_width / 2, label, label_text_width, '#fff', flat))
+    parts.append(_text(label_width + message_width / 2, message, message_text_width,
+                       message_text_color, flat))
+    parts.append('</g></svg>')
+
+    return ''.join(parts)
+
+
+def render_language_badge(language: str, lines: int, style: str = 'flat-square') -> str:
+    """Render the badge for one language, matching generate_badge_url."""
+    return render_badge(language, f"{format_number(lines)} lines", get_language_color(language), style)
+
+
+def badge_data_uri(svg: str) -> str:
+    """Encode a badge as a data: URI for inline use."""
+    return 'data:image/svg+xml;base64,' + base64.b64encode(svg.encode('utf-8')).decode('ascii')
+
+
+def badge_filename(language: str) -> str:
+    """File name for a language badge, e.g. 'C++' -> 'cpp.svg', 'C#' -> 'csharp.svg'."""
+    slug = language.lower().replace('++', 'pp').replace('+', 'plus').replace('#', 'sharp')
+    slug = re.sub(r'[^a-z0-9]+', '-', slug).strip('-')
+    return f"{slug or 'language'}.svg"
+
+
+def save_badges(
+    loc_data: Dict[str, int],
+    output_dir: str,
+    top_n: int = 8,
+    style: str = 'flat-square'
+) -> Dict[str, str]:
+    """
+    Render the badges of the top N languages in one pass and write them to
+    `output_dir`. Files whose content is unchanged are not rewritten.
+
+    Returns:
+        Dictionary mapping language names to badge file names
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sorted_langs = sorted(loc_data.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+    files = {}
+    written = 0
+    for lang, lines in sorted_langs:
+        files[lang] = badge_filename(lang)
+        written += write_if_changed(output_dir / files[lang], render_language_badge(lang, lines, style))
+
+    print(f"Badges saved to {output_dir} ({written} written, {len(files) - written} unchanged)")
+    return files
+
+
+def local_badge_url(language: str, badge_base: Optional[str]) -> Optional[str]:
+    """URL of a locally generated badge under `badge_base`, or None to use shields.io."""
+    if not badge_base:
+        return None
+    return f"{badge_base.rstrip('/')}/{badge_filename(language)}"
+
+
+if __name__ == '__main__':
+    # Example usage
+    sample_data = {
+        'Python': 15000,
+        'JavaScript': 8500,
+        'C++': 6200,
+        'Rust': 4100,
+    }
+
+    print(render_language_badge('Python', 15000))
+    save_badges(sample_data, 'badges')
@@ -0,0 +1,362 @@
+"""
+Render SVG statistics cards in several themes, sizes and layouts.
+
+The static parts of a card (style sheet, frame, headings) come from templates
+prebuilt once per theme, and the per-language fragments (colour, escaped
+name, percentage, formatted count) are computed once per dataset. Rendering
+many variants of the same statistics therefore only costs the string joins.
+
+Output is minified: no indentation or newlines, one shared font declaration,
+coordinates trimmed to two decimals.
+
+A variant is a dictionary:
+
+    {'name': 'loc_stats-dark', 'theme': 'dark', 'layout': 'donut', 'top_n': 6, 'width': 495}
+
+Every key is optional; missing keys take the values in DEFAULT_VARIANT.
+"""
+import gzip
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from atomic import write_if_changed
+from badge import format_number, get_language_color
+
+
+THEMES = {
+    'light': {'title': '2f80ed', 'text': '333', 'muted': '666', 'background': 'fffefe', 'border': 'e4e2e2'},
+    'dark': {'title': '58a6ff', 'text': 'c9d1d9', 'muted': '8b949e', 'background': '0d1117', 'border': '30363d'},
+    'dracula': {'title': 'ff79c6', 'text': 'f8f8f2', 'muted': 'bd93f9', 'background': '282a36', 'border': '44475a'},
+    'solarized': {'title': '268bd2', 'text': '586e75', 'muted': '93a1a1', 'background': 'fdf6e3', 'border': 'eee8d5'},
+}
+LAYOUTS = ('normal', 'compact', 'donut')
+COMPRESS_FORMATS = ('svgz', 'gz')
+
+DEFAULT_VARIANT = {'theme': 'light', 'layout': 'normal', 'top_n': 8, 'width': 495}
+
+FONT = "'Segoe UI',Ubuntu,sans-serif"
+MONO_FONT = "'Segoe UI',Ubuntu,monospace"
+
+# Classes: h header, v total value, l label, n language name, c line count
+STYLE_TEMPLATE = (
+    '<style>text{{font:400 11px {font};fill:#{muted}}}'
+    '.h{{font:600 18px {font};fill:#{title}}}'
+    '.v{{font:600 20px {font};fill:#{text}}}'
+    '.l{{font-size:12px}}'
+    '.n{{font-size:12px;fill:#{text}}}'
+    '.c{{font-family:{mono}}}</style>'
+)
+
+OPEN_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+    'viewBox="0 0 {width} {height}" role="img" aria-labelledby="t d">'
+    '<title id="t">{title}</title><desc id="d">Lines of code statistics for {username}</desc>'
+    '{style}<rect x=".5" y=".5" width="{inner_width}" height="{inner_height}" rx="4.5" '
+    'fill="#{background}" stroke="#{border}"/><g transform="translate(20 25)">'
+    '<text class="h">{title}</text>'
+)
+CLOSE = '</g></svg>'
+
+# Prebuilt once per theme
+STYLES = {
+    name: STYLE_TEMPLATE.format(font=FONT, mono=MONO_FONT, **colors)
+    for name, colors in THEMES.items()
+}
+
+BAR_HEIGHT = 8
+ROW_HEIGHT = 25
+COMPACT_ROW_HEIGHT = 20
+DONUT_ROW_HEIGHT = 22
+DONUT_RADIUS = 45
+DONUT_STROKE = 20
+
+
+def _num(value: float) -> str:
+    """Format a coordinate with at most two decimals and no trailing zeros."""
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return text if text != '-0' else '0'
+
+
+def prepare(loc_data: Dict[str, int], top_n: int) -> Dict:
+    """
+    Compute the data shared by every variant: the top languages with their
+    escaped name, colour, share of all lines and formatted count.
+    """
+    total = sum(loc_data.values())
+    top = sorted(loc_data.items(), key=lambda x: x[1], reverse=True)[:top_n]
+    languages = [
+        (escape(lang), f"#{get_language_color(lang)}", count / total if total else 0.0, format_number(count))
+        for lang, count in top
+    ]
+    return {
+        'total': total,
+        'total_text': f"{total:,}",
+        'total_short': format_number(total),
+        'languages': languages,
+    }
+
+
+def resolve_variant(variant: Optional[Dict] = None) -> Dict:
+    """Fill in defaults and validate a variant."""
+    resolved = dict(DEFAULT_VARIANT, **(variant or {}))
+    if resolved['theme'] not in THEMES:
+        raise ValueError(f"Unknown theme '{resolved['theme']}', expected one of {sorted(THEMES)}")
+    if resolved['layout'] not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{resolved['layout']}', expected one of {LAYOUTS}")
+    resolved['top_n'] = int(resolved['top_n'])
+    resolved['width'] = int(resolved['width'])
+    resolved.setdefault('name', variant_name(resolved))
+    return resolved
+
+
+def variant_name(variant: Dict) -> str:
+    """File stem for a variant, e.g. 'loc_stats-dark-donut-top6-495'."""
+    return f"loc_stats-{variant['theme']}-{variant['layout']}-top{variant['top_n']}-{variant['width']}"
+
+
+def _bar(languages: List[Tuple], y: float, width: float) -> str:
+    """Stacked bar of the language shares."""
+    parts = []
+    x = 0.0
+    for _, color, share, _ in languages:
+        bar_width = share * width
+        if bar_width < 1:  # Skip very small bars
+            continue
+        parts.append(f'<rect x="{_num(x)}" y="{_num(y)}" width="{_num(bar_width)}" '
+                     f'height="{BAR_HEIGHT}" fill="{color}" rx="2"/>')
+        x += bar_width
+    return ''.join(parts)
+
+
+def _normal(data: Dict, top_n: int, width: int) -> Tuple[str, int]:
+    """Total, language bar and one row per language with share and line count."""
+    languages = data['languages'][:top_n]
+    inner = width - 40
+    percent_x = inner - 175
+    lines_x = inner - 15
+
+    parts = [
+        '<text y="30" class="l">Total Lines of Code</text>',
+        f'<text y="50" class="v">{data["total_text"]}</text>',
+        '<text y="70" class="l">Language Distribution</text>',
+        _bar(languages, 85, inner),
+    ]
+    for i, (name, color, share, lines) in enumerate(languages):
+        y = 110 + i * ROW_HEIGHT
+        parts.append(
+            f'<circle cx="5" cy="{y + 6}" r="5" fill="{color}"/>'
+            f'<text x="15" y="{y + 10}" class="n">{name}</text>'
+            f'<text x="{percent_x}" y="{y + 10}" text-anchor="end">{share * 100:.1f}%</text>'
+            f'<text x="{lines_x}" y="{y + 10}" class="c" text-anchor="end">{lines} lines</text>'
+        )
+
+    height = 150 + len(languages) * ROW_HEIGHT
+    return ''.join(parts), height
+
+
+def _compact(data: Dict, top_n: int, width: int) -> Tuple[str, int]:
+    """Total next to the title, language bar and a two-column legend."""
+    languages = data['languages'][:top_n]
+    inner = width - 40
+    column = inner / 2
+
+    parts = [
+        f'<text x="{inner}" text-anchor="end">{data["total_text"]} lines</text>',
+        _bar(languages, 18, inner),
+    ]
+    for i, (name, color, share, _) in enumerate(languages):
+        x = _num((i % 2) * column)
+        y = 45 + (i // 2) * COMPACT_ROW_HEIGHT
+        parts.append(
+            f'<g transform="translate({x} {y})"><circle cx="5" cy="-4" r="5" fill="{color}"/>'
+            f'<text x="15" class="n">{name}</text>'
+            f'<text x="{_num(column - 10)}" text-anchor="end">{share * 100:.1f}%</text></g>'
+        )
+
+    rows = (len(languages) + 1) // 2
+    height = 65 + rows * COMPACT_ROW_HEIGHT
+    return ''.join(parts), height
+
+
+def _donut(data: Dict, top_n: int, width: int, theme: Dict) -> Tuple[str, int]:
+    """Donut chart of the language shares with a legend beside it."""
+    languages = data['languages'][:top_n]
+    inner = width - 40
+    cx = DONUT_RADIUS + DONUT_STROKE / 2
+    cy = 35 + cx
+    legend_x = int(2 * cx + 25)
+
+    # Segments use pathLength="100", so dash lengths are percentages
+    segments = []
+    offset = 0.0
+    shares = [(color, share) for _, color, share, _ in languages]
+    other = 1.0 - sum(share for _, share in shares)
+    if other > 0.0005:
+        shares.append((f"#{theme['border']}", other))
+    for color, share in shares:
+        length = share * 100
+        segments.append(
+            f'<circle cx="{_num(cx)}" cy="{_num(cy)}" r="{DONUT_RADIUS}" fill="none" stroke="{color}" '
+            f'stroke-width="{DONUT_STROKE}" pathLength="100" '
+            f'stroke-dasharray="{_num(length)} {_num(100 - length)}" stroke-dashoffset="{_num(-offset)}"/>'
+        )
+        offset += length
+
+    parts = [
+        f'<g transform="rotate(-90 {_num(cx)} {_num(cy)})">{"".join(segments)}</g>',
+        f'<text x="{_num(cx)}" y="{_num(cy + 4)}" class="n" text-anchor="middle">{data["total_short"]}</text>',
+    ]
+    for i, (name, color, share, _) in enumerate(languages):
+        y = 40 + i * DONUT_ROW_HEIGHT
+        parts.append(
+            f'<circle cx="{legend_x + 5}" cy="{y - 4}" r="5" fill="{color}"/>'
+            f'<text x="{legend_x + 15}" y="{y}" class="n">{name}</text>'
+            f'<text x="{inner}" y="{y}" text-anchor="end">{share * 100:.1f}%</text>'
+        )
+
+    height = int(max(cy + cx + 45, 60 + len(languages) * DONUT_ROW_HEIGHT))
+    return ''.join(parts), height
+
+
+def render_prepared(
+    data: Dict,
+    variant: Dict,
+    username: str = "User",
+    title: str = "Code Statistics"
+) -> str:
+    """Render one resolved variant from data computed by prepare()."""
+    theme = THEMES[variant['theme']]
+    width = variant['width']
+    layout = variant['layout']
+
+    if layout == 'compact':
+        body, height = _compact(data, variant['top_n'], width)
+    elif layout == 'donut':
+        body, height = _donut(data, variant['top_n'], width, theme)
+    else:
+        body, height = _normal(data, variant['top_n'], width)
+
+    head = OPEN_TEMPLATE.format(
+        width=width,
+        height=height,
+        inner_width=width - 1,
+        inner_height=height - 1,
+        title=escape(title),
+        username=escape(username),
+        style=STYLES[variant['theme']],
+        background=theme['background'],
+        border=theme['border'],
+    )
+    return head + body + CLOSE
+
+
+def render_card(
+    loc_data: Dict[str, int],
+    username: str = "User",
+    title: str = "Code Statistics",
+    **variant
+) -> str:
+    """
+    Render a single card.
+
+    Args:
+        loc_data: Dictionary mapping languages to line counts
+        username: GitHub username
+        title: Card title
+        **variant: theme, layout, top_n and width (see DEFAULT_VARIANT)
+
+    Returns:
+        Minified SVG as a string
+    """
+    variant = resolve_variant(variant)
+    return render_prepared(prepare(loc_data, variant['top_n']), variant, username, title)
+
+
+def render_variants(
+    loc_data: Dict[str, int],
+    variants: Iterable[Dict],
+    username: str = "User",
+    title: str = "Code Statistics"
+) -> Dict[str, str]:
+    """
+    Render many variants of the same statistics in one pass.
+
+    Returns:
+        Dictionary mapping variant names to minified SVG
+    """
+    variants = [resolve_variant(v) for v in variants]
+    if not variants:
+        return {}
+
+    data = prepare(loc_data, max(v['top_n'] for v in variants))
+    return {v['name']: render_prepared(data, v, username, title) for v in variants}
+
+
+def compress(svg: str) -> bytes:
+    """Gzip an SVG reproducibly (no timestamp), for .svgz and .svg.gz files."""
+    return gzip.compress(svg.encode('utf-8'), compresslevel=9, mtime=0)
+
+
+def compressed_paths(svg_path: Path, formats: Sequence[str]) -> List[Path]:
+    """Paths of the precompressed copies of `svg_path`: name.svgz and/or name.svg.gz."""
+    paths = []
+    for fmt in formats:
+        if fmt not in COMPRESS_FORMATS:
+            raise ValueError(f"Unknown compression format '{fmt}', expected one of {COMPRESS_FORMATS}")
+        paths.append(svg_path.with_suffix('.svgz') if fmt == 'svgz' else svg_path.with_name(svg_path.name + '.gz'))
+    return paths
+
+
+def save_card(svg: str, svg_path: Path, formats: Sequence[str] = ()) -> bool:
+    """
+    Write a card and its precompressed copies, leaving unchanged files alone.
+
+    Returns:
+        True if any file was written
+    """
+    svg_path = Path(svg_path)
+    written = write_if_changed(svg_path, svg)
+    compressed = compress(svg) if formats else b''
+    for path in compressed_paths(svg_path, formats):
+        written = write_if_changed(path, compressed) or written
+    return written
+
+
+def save_variants(
+    loc_data: Dict[str, int],
+    variants: Iterable[Dict],
+    output_dir: str,
+    username: str = "User",
+    formats: Sequence[str] = ()
+) -> Dict[str, bool]:
+    """
+    Render and save many variants in one pass.
+
+    Returns:
+        Dictionary mapping variant names to whether any of their files were written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    return {
+        name: save_card(svg, output_dir / f"{name}.svg", formats)
+        for name, svg in render_variants(loc_data, variants, username).items()
+    }
+
+
+if __name__ == '__main__':
+    # Example usage
+    sample_data = {
+        'Python': 15234,
+        'JavaScript': 8521,
+        'TypeScript': 6234,
+        'Rust': 4123,
+        'Go': 2341,
+        'HTML': 1823,
+        'CSS': 1234,
+        'Shell': 567,
+    }
+
+    variants = [{'theme': theme, 'layout': layout} for theme in THEMES for layout in LAYOUTS]
+    save_variants(sample_data, variants, 'cards', username="YourGitHub", formats=['svgz'])
@@ -3,6 +3,7 @@ Generate markdown tables and sections for GitHub README.
 """
 from typing import Dict
 from badge import generate_badge_url, format_number
+from badge_svg import local_badge_url
 
 
 def generate_markdown_table(loc_data: Dict[str, int], top_n: int = 8) -> str:
@@ -33,10 +34,16 @@ def generate_markdown_table(loc_data: Dict[str, int], top_n: int = 8) -> str:
     return "\n".join(lines)
 
 
-def generate_badge_section(loc_data: Dict[str, int], top_n: int = 8) -> str:
+def generate_badge_section(loc_data: Dict[str, int], top_n: int = 8, badge_base: str = None) -> str:
     """
     Generate a section with badge images for languages.
     
+    Args:
+        loc_data: Dictionary mapping languages to line counts
+        top_n: Number of top languages to include
+        badge_base: Path or URL of badges rendered by badge_svg.save_badges;
+            shields.io URLs are used when not given
+    
     Returns:
         Markdown with badge images
     """
@@ -44,14 +51,19 @@ def generate_badge_section(loc_data: Dict[str, int], top_n: int = 8) -> str:
     
     badges = []
     for lang, lines in sorted_langs:
-        badge_url = generate_badge_url(lang, lines)
+        badge_url = local_badge_url(lang, badge_base) or generate_badge_url(lang, lines)
         badges.append(f"![{lang}]({badge_url})")
     
     # Return badges with some spacing
     return " ".join(badges)
 
 
-def generate_full_section(loc_data: Dict[str, int], top_n: int = 8, include_table: bool = True) -> str:
+def generate_full_section(
+    loc_data: Dict[str, int],
+    top_n: int = 8,
+    include_table: bool = True,
+    badge_base: str = None
+) -> str:
     """
     Generate a complete README section with badges and optionally a table.
     
@@ -67,7 +79,7 @@ def generate_full_section(loc_data: Dict[str, int], top_n: int = 8, include_tabl
         "",
         "### Top Languages",
         "",
-        generate_badge_section(loc_data, top_n),
+        generate_badge_section(loc_data, top_n, badge_base),
     ]
     
     if include_table:
@@ -81,7 +93,7 @@ def generate_full_section(loc_data: Dict[str, int], top_n: int = 8, include_tabl
     return "\n".join(sections)
 
 
-def generate_compact_section(loc_data: Dict[str, int], top_n: int = 8) -> str:
+def generate_compact_section(loc_data: Dict[str, int], top_n: int = 8, badge_base: str = None) -> str:
     """
     Generate a compact section with just badges and total count.
     Perfect for inserting into an existing README.
@@ -92,7 +104,7 @@ def generate_compact_section(loc_data: Dict[str, int], top_n: int = 8) -> str:
     sections = [
         "### 💻 Lines of Code",
         "",
-        generate_badge_section(loc_data, top_n),
+        generate_badge_section(loc_data, top_n, badge_base),
         "",
         f"*Total: {total_lines:,} lines across {len(loc_data)} languages*"
     ]
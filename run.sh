@@ -27,21 +27,10 @@ echo "  Style: $SECTION_TYPE"
 echo "  Generate SVG: $GENERATE_SVG"
 echo ""
 
-# Step 1: Aggregation
-echo "Step 1/2: Counting lines of code..."
-cd aggregator
-python aggregate.py
-cd ..
-
-# Step 2: Update README
-echo ""
-echo "Step 2/2: Updating README..."
-cd updater
-export README_PATH="../$README_PATH"
+# All stages run in a single Python process
 export SECTION_TYPE
 export GENERATE_SVG
-python update_readme.py
-cd ..
+python "$(dirname "$0")/loc_counter.py" all --readme "$README_PATH"
 
 echo ""
 echo "======================================"
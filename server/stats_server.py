@@ -0,0 +1,404 @@
+"""
+Small HTTP server for the LOC statistics.
+
+Serves the SVG card, per-language badges and the raw statistics straight from
+loc_results.json, so the README can link to a self-hosted image instead of a
+committed file or shields.io.
+
+    GET  /card.svg?theme=light&layout=normal&top_n=8&width=495
+    GET  /badge/<language>.svg?style=flat-square
+    GET  /stats.json
+    POST /refresh/<repo>     pull and recount one repository
+
+Rendered responses are kept in an LRU cache and carry an ETag, so repeated
+requests are answered with 304 Not Modified. Responses are gzip-compressed
+for clients that accept it.
+"""
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'renderer'))
+sys.path.insert(1, str(ROOT / 'aggregator'))
+
+from atomic import atomic_write
+from badge_svg import STYLES as BADGE_STYLES, render_language_badge
+from card_engine import LAYOUTS, THEMES
+from svg_card import generate_svg_card
+
+
+RESULTS_FILE = ROOT / 'aggregator' / 'loc_results.json'
+
+CACHE_SIZE = 128
+ALL_LANGUAGES = '*'
+
+
+class RenderCache:
+    """
+    LRU cache of rendered responses.
+
+    Every entry records the languages it depends on, so a recount only drops
+    the entries whose output can change. Each invalidation starts a new
+    generation; a render started in an earlier generation is not cached,
+    since it may have used the results from before the recount.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Read this before reading the results a response is rendered from."""
+        return self._generation
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, body: bytes, content_type: str, depends_on: Set[str],
+            generation: Optional[int] = None) -> Dict:
+        """Build an entry and cache it, unless the cache was invalidated since `generation`."""
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong validators differ per content-coding
+        entry = {
+            'body': body,
+            'gzip': gzip.compress(body, mtime=0),
+            'etag': f'"{digest}"',
+            'gzip_etag': f'"{digest}-gz"',
+            'content_type': content_type,
+            'depends_on': depends_on,
+        }
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, languages: Set[str]) -> int:
+        """Drop entries that depend on any of `languages`; returns how many were dropped."""
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if ALL_LANGUAGES in entry['depends_on'] or entry['depends_on'] & languages
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class StatsStore:
+    """
+    Statistics loaded from loc_results.json, reloaded when the file changes.
+
+    `results` is never modified in place: a reload or refresh replaces it, so
+    the dictionary returned by load() is a consistent snapshot.
+    """
+
+    def __init__(
+        self,
+        results_file: Path = RESULTS_FILE,
+        cache: RenderCache = None,
+        repos_dir: Optional[Path] = None,
+        engine: str = 'auto',
+        shared_objects: Optional[Path] = None
+    ):
+        self.results_file = Path(results_file)
+        self.cache = cache if cache is not None else RenderCache()
+        self.repos_dir = Path(repos_dir) if repos_dir else ROOT / 'aggregator' / 'repos'
+        self.engine = engine
+        self.shared_objects = shared_objects
+        self._lock = threading.Lock()
+        self._repo_locks: Dict[str, threading.Lock] = {}
+        self._mtime = None
+        self.results: Dict = {'languages': {}}
+
+    def load(self) -> Dict:
+        """Return the current results, reloading them if the file was rewritten."""
+        with self._lock:
+            try:
+                mtime = self.results_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                return self.results
+            if mtime != self._mtime:
+                with open(self.results_file, 'r') as f:
+                    self.results = json.load(f)
+                self._mtime = mtime
+                self.cache.clear()
+            return self.results
+
+    def _repo_lock(self, repo_name: str) -> threading.Lock:
+        with self._lock:
+            return self._repo_locks.setdefault(repo_name, threading.Lock())
+
+    def refresh_repo(self, repo_name: str) -> Dict[str, int]:
+        """
+        Pull one repository and apply the difference in its line counts.
+
+        Refreshes of the same repository run one at a time, so concurrent
+        pulls cannot collide and each change is only applied once. The
+        Python engine counts in-process, since forking a threaded server is
+        unsafe.
+
+        Returns:
+            Dictionary mapping each changed language to its change in lines
+        """
+        import metrics
+        from aggregate import count_repo
+        from clone_or_fetch import clone_or_update_repo
+        from clone_store import mark_used
+
+        repo_path = self.repos_dir / repo_name
+        if not repo_path.is_dir():
+            raise KeyError(repo_name)
+
+        with self._repo_lock(repo_name):
+            # Nothing writes the server's metrics; keep them from piling up
+            metrics.reset()
+            before = count_repo(repo_path, self.engine, workers=0)
+            if not clone_or_update_repo({'name': repo_name, 'clone_url': None}, self.repos_dir,
+                                        self.shared_objects):
+                raise RuntimeError(f"Failed to update {repo_name}")
+            mark_used(self.repos_dir, [repo_name])
+            after = count_repo(repo_path, self.engine, workers=0)
+
+            delta = {
+                lang: after.get(lang, 0) - before.get(lang, 0)
+                for lang in set(before) | set(after)
+                if after.get(lang, 0) != before.get(lang, 0)
+            }
+            if not delta:
+                return delta
+
+            with self._lock:
+                languages = dict(self.results.get('languages', {}))
+                for lang, change in delta.items():
+                    languages[lang] = languages.get(lang, 0) + change
+                    if languages[lang] <= 0:
+                        del languages[lang]
+                self.results = dict(self.results, languages=languages)
+
+                # Persist without triggering a full reload on the next request
+                atomic_write(self.results_file, json.dumps(self.results, indent=2))
+                self._mtime = self.results_file.stat().st_mtime_ns
+
+        self.cache.invalidate(set(delta))
+        return delta
+
+
+def _int_param(query: Dict, name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        value = default
+    return max(low, min(high, value))
+
+
+def render_card(store: StatsStore, query: Dict) -> Optional[Dict]:
+    """Render (or fetch from cache) the SVG card variant described by `query`."""
+    theme = query.get('theme', ['light'])[0]
+    layout = query.get('layout', ['normal'])[0]
+    if theme not in THEMES or layout not in LAYOUTS:
+        return None
+
+    top_n = _int_param(query, 'top_n', 8, 1, 30)
+    width = _int_param(query, 'width', 495, 300, 1000)
+    key = ('card', theme, layout, top_n, width)
+
+    entry = store.cache.get(key)
+    if entry is None:
+        generation = store.cache.generation
+        results = store.load()
+        svg = generate_svg_card(results['languages'], results.get('username') or 'User', top_n, width,
+                                theme=theme, layout=layout)
+        entry = store.cache.put(key, svg.encode('utf-8'), 'image/svg+xml; charset=utf-8', {ALL_LANGUAGES},
+                                generation)
+    return entry
+
+
+def render_stats(store: StatsStore) -> Dict:
+    """Render (or fetch from cache) the JSON statistics."""
+    key = ('stats',)
+    entry = store.cache.get(key)
+    if entry is None:
+        generation = store.cache.generation
+        results = store.load()
+        payload = dict(results, total_lines=sum(results['languages'].values()))
+        body = json.dumps(payload, indent=2).encode('utf-8')
+        entry = store.cache.put(key, body, 'application/json', {ALL_LANGUAGES}, generation)
+    return entry
+
+
+def render_badge(store: StatsStore, language: str, query: Dict) -> Optional[Dict]:
+    """Render (or fetch from cache) the badge of one language; None if it has no statistics."""
+    style = query.get('style', ['flat-square'])[0]
+    if style not in BADGE_STYLES:
+        style = 'flat-square'
+
+    key = ('badge', language, style)
+    entry = store.cache.get(key)
+    if entry is None:
+        generation = store.cache.generation
+        lines = store.load()['languages'].get(language)
+        if lines is None:
+            return None
+        svg = render_language_badge(language, lines, style)
+        entry = store.cache.put(key, svg.encode('utf-8'), 'image/svg+xml; charset=utf-8', {language},
+                                generation)
+    return entry
+
+
+def make_handler(store: StatsStore):
+    """Build a request handler class bound to `store`."""
+
+    class StatsHandler(BaseHTTPRequestHandler):
+        server_version = 'LocStats/1.0'
+
+        def do_GET(self):
+            store.load()
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if url.path == '/card.svg':
+                entry = render_card(store, query)
+                if entry is None:
+                    return self.send_error(400, f"Unknown theme or layout; themes: {', '.join(THEMES)}; "
+                                                f"layouts: {', '.join(LAYOUTS)}")
+                return self.send_entry(entry)
+
+            if url.path == '/stats.json':
+                return self.send_entry(render_stats(store))
+
+            if url.path.startswith('/badge/') and url.path.endswith('.svg'):
+                language = unquote(url.path[len('/badge/'):-len('.svg')])
+                entry = render_badge(store, language, query)
+                if entry is None:
+                    return self.send_error(404, f"No statistics for {language}")
+                return self.send_entry(entry)
+
+            self.send_error(404)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if not url.path.startswith('/refresh/'):
+                return self.send_error(404)
+
+            repo_name = unquote(url.path[len('/refresh/'):])
+            if not repo_name or '/' in repo_name or repo_name.startswith('.'):
+                return self.send_error(400, "Invalid repository name")
+
+            store.load()
+            try:
+                delta = store.refresh_repo(repo_name)
+            except KeyError:
+                return self.send_error(404, f"Repository {repo_name} is not cloned")
+            except RuntimeError as e:
+                return self.send_error(502, str(e))
+
+            body = json.dumps({'repo': repo_name, 'changed': delta}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_entry(self, entry: Dict):
+            """Send a cached response, honouring If-None-Match and Accept-Encoding."""
+            use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            headers = {
+                'ETag': entry['gzip_etag'] if use_gzip else entry['etag'],
+                'Cache-Control': 'public, max-age=300',
+                'Vary': 'Accept-Encoding',
+            }
+
+            # Either coding's tag means the client holds the current content
+            if_none_match = self.headers.get('If-None-Match', '')
+            tags = {tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+                    for tag in if_none_match.split(',')}
+            if '*' in tags or entry['etag'] in tags or entry['gzip_etag'] in tags:
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+
+            body = entry['body']
+            if use_gzip:
+                body = entry['gzip']
+                headers['Content-Encoding'] = 'gzip'
+
+            self.send_response(200)
+            self.send_header('Content-Type', entry['content_type'])
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
+
+        do_HEAD = do_GET
+
+    return StatsHandler
+
+
+def serve(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    results_file: Path = RESULTS_FILE,
+    repos_dir: Optional[Path] = None,
+    engine: str = 'auto',
+    shared_objects: Optional[Path] = None
+):
+    """Serve the statistics until interrupted; refreshes use `repos_dir`, `engine` and `shared_objects`."""
+    store = StatsStore(results_file, repos_dir=repos_dir, engine=engine, shared_objects=shared_objects)
+    store.load()
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+
+    print(f"Serving LOC statistics from {results_file} on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve LOC statistics over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--results', type=Path, default=RESULTS_FILE)
+    parser.add_argument('--repos-dir', type=Path, default=ROOT / 'aggregator' / 'repos')
+    parser.add_argument('--engine', choices=['auto', 'rust', 'python'], default='auto')
+    parser.add_argument('--shared-objects', type=Path, default=None,
+                        help='Shared object store of the clones, if they use one')
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.results, args.repos_dir, args.engine, args.shared_objects)
@@ -14,27 +14,31 @@ fi
 
 echo "✓ Python 3 found"
 
-# Check for Rust/Cargo
-if ! command -v cargo &> /dev/null; then
-    echo "Error: Rust/Cargo is required but not installed."
+# Check for Rust/Cargo (optional: without it the Python engine counts)
+if command -v cargo &> /dev/null; then
+    HAVE_CARGO=1
+    echo "✓ Rust/Cargo found"
+else
+    HAVE_CARGO=0
+    echo "Warning: Rust/Cargo not found, the slower Python counting engine will be used."
     echo "Install from: https://rustup.rs/"
-    exit 1
 fi
 
-echo "✓ Rust/Cargo found"
-
 # Install Python dependencies
 echo ""
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
+pip install -e .
 
 # Build Rust LOC counter
-echo ""
-echo "Building Rust LOC counter..."
-cd engine
-cargo build --release
-cp target/release/loc_runner ./loc_runner
-cd ..
+if [ "$HAVE_CARGO" = 1 ]; then
+    echo ""
+    echo "Building Rust LOC counter..."
+    cd engine
+    cargo build --release
+    cp target/release/loc_runner ./loc_runner
+    cd ..
+fi
 
 echo ""
 echo "✓ Setup complete!"
@@ -48,9 +52,6 @@ echo "2. Add markers to your README.md where you want stats:"
 echo "   <!-- LOC-STATS:START -->"
 echo "   <!-- LOC-STATS:END -->"
 echo ""
-echo "3. Run the aggregator:"
-echo "   cd aggregator && python aggregate.py"
-echo ""
-echo "4. Update your README:"
-echo "   cd updater && python update_readme.py"
+echo "3. Count and update your README:"
+echo "   loc-counter all"
 echo ""
\ No newline at end of file
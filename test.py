@@ -3,15 +3,200 @@
 Test script to verify all components work without actual GitHub API calls.
 """
 import json
+import os
+import subprocess
 import sys
+import tempfile
 from pathlib import Path
+from unittest import mock
 
 # Add renderer to path
 sys.path.append(str(Path(__file__).parent / 'renderer'))
+sys.path.append(str(Path(__file__).parent / 'engine'))
+sys.path.append(str(Path(__file__).parent / 'updater'))
+sys.path.append(str(Path(__file__).parent / 'aggregator'))
 
 from renderer.badge import generate_all_badges
-from renderer.markdown import generate_full_section, generate_compact_section
+from renderer.markdown import generate_full_section, generate_compact_section, generate_markdown_table
 from renderer.svg_card import save_svg_card
+from language_registry import detect_language, is_stale
+from py_engine import count_loc
+import rust_build
+from batch_update import update_readmes
+from update_readme import generate_svg
+from clone_store import enforce_budget, prune_unlisted, save_index
+import fetch_repos
+import loc_counter
+
+ENGINE_DIR = Path(__file__).parent / 'engine'
+
+# Synthetic repository for the counting engines: file name -> content
+ENGINE_TREE = {
+    'main.py': b"import os\nprint(os.name)\n\n",
+    'no_newline.rs': b"fn main() {\n}",
+    'crlf.js': b"let a = 1;\r\nlet b = 2;\r\n",
+    'empty.go': b"",
+    'Dockerfile': b"FROM python:3.11\nRUN pip install requests\n",
+    'CMakeLists.txt': b"project(demo)\n",
+    'deploy': b"#!/usr/bin/env python3\nprint('deploy')\n",
+    'notes': b"not code\n",
+    'latin1.py': b"caf\xe9\n",
+    'Makefile': b"all:\n\techo hi\n",
+    'node_modules/dep.js': b"module.exports = 1;\n",
+    'src/big.py': b"x = 1\n" * 100_000,
+}
+ENGINE_EXPECTED = {'Python': 100_005, 'Rust': 2, 'JavaScript': 2, 'Go': 0, 'Dockerfile': 2, 'CMake': 1}
+
+
+def test_engine_parity():
+    """
+    Check the Python engine on a synthetic tree and against loc_runner,
+    which is built first if needed.
+    
+    The comparison is skipped without a Rust toolchain, when cargo cannot
+    fetch the crates (e.g. offline) or when SKIP_RUST_PARITY is set; a
+    binary that fails to run is an error.
+    
+    Returns:
+        Why the comparison was skipped, or None if it ran
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, content in ENGINE_TREE.items():
+            path = Path(tmp) / 'demo' / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        
+        python_results, _ = count_loc(tmp, workers=2)
+        assert python_results == ENGINE_EXPECTED, python_results
+        
+        if os.environ.get('SKIP_RUST_PARITY'):
+            return "SKIP_RUST_PARITY is set"
+        if rust_build.is_stale():
+            if not rust_build.have_cargo():
+                return "no Rust toolchain"
+            build = rust_build.build()
+            if build.returncode != 0:
+                assert rust_build.is_fetch_error(build.stderr), f"could not build loc_runner: {build.stderr}"
+                return "cargo could not fetch the crates"
+        result = subprocess.run([str(rust_build.BINARY), tmp], cwd=ENGINE_DIR, capture_output=True, text=True)
+        assert result.returncode == 0, f"loc_runner failed: {result.stderr}"
+        rust_results = json.loads(result.stdout)
+        assert rust_results == python_results, (rust_results, python_results)
+        return None
+
+
+def file_versions(*paths):
+    """(inode, mtime) of each file; both change when a file is rewritten."""
+    return [(path.stat().st_ino, path.stat().st_mtime_ns) for path in paths]
+
+
+def test_incremental_render(loc_data):
+    """
+    Render a README block and the card twice: the second run must write
+    nothing, and a hand-edited block must be rendered again.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        readme = Path(tmp) / 'README.md'
+        card = Path(tmp) / 'loc_stats.svg'
+        readme.write_text("# Demo\n<!-- LOC-STATS:START -->\n<!-- LOC-STATS:END -->\nFooter\n")
+        targets = [{'path': str(readme)}]
+        cache = {}
+        
+        assert update_readmes(targets, loc_data, cache) == {str(readme): 'updated'}
+        generate_svg(loc_data, 'TestUser', tmp, cache=cache)
+        rendered = readme.read_text()
+        written = file_versions(readme, card)
+        
+        skipped = []
+        assert update_readmes(targets, loc_data, cache) == {str(readme): 'skipped'}
+        generate_svg(loc_data, 'TestUser', tmp, cache=cache, skipped=skipped)
+        assert skipped == [str(card)], skipped
+        assert file_versions(readme, card) == written, "second run rewrote a file"
+        
+        readme.write_text(rendered.replace('<!-- LOC-STATS:END -->', 'Edited by hand\n<!-- LOC-STATS:END -->'))
+        assert update_readmes(targets, loc_data, cache) == {str(readme): 'updated'}
+        assert readme.read_text() == rendered
+
+
+def test_named_blocks(loc_data):
+    """
+    Rewrite a README with an unnamed block, two named blocks and a block of
+    an unknown style, listed twice under different paths.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        readme = Path(tmp) / 'README.md'
+        readme.write_text(
+            "<!-- LOC-STATS:START -->\nold\n<!-- LOC-STATS:END -->\n"
+            "<!-- LOC-STATS:table:START -->\nold\n<!-- LOC-STATS:table:END -->\n"
+            "<!-- LOC-STATS:pie:START -->\nkept\n<!-- LOC-STATS:pie:END -->\n"
+            "<!-- LOC-STATS:full:START -->\nold\n<!-- LOC-STATS:full:END -->\n"
+        )
+        (Path(tmp) / 'docs').mkdir()
+        targets = [{'path': str(readme)}, {'path': os.path.join(tmp, 'docs', '..', 'README.md')}]
+        
+        assert update_readmes(targets, loc_data) == {str(readme): 'updated'}
+        assert readme.read_text() == (
+            f"<!-- LOC-STATS:START -->\n{generate_compact_section(loc_data)}\n<!-- LOC-STATS:END -->\n"
+            f"<!-- LOC-STATS:table:START -->\n{generate_markdown_table(loc_data)}\n<!-- LOC-STATS:table:END -->\n"
+            "<!-- LOC-STATS:pie:START -->\nkept\n<!-- LOC-STATS:pie:END -->\n"
+            f"<!-- LOC-STATS:full:START -->\n{generate_full_section(loc_data)}\n<!-- LOC-STATS:full:END -->\n"
+        )
+
+
+class FakeResponse:
+    def __init__(self, status_code, repos=None):
+        self.status_code = status_code
+        self.text = 'error'
+        self._repos = repos
+    
+    def json(self):
+        return self._repos
+
+
+def git(*args, cwd=None):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def test_clone_store():
+    """
+    Evict clones least recently used (then largest) first, and never prune
+    on an empty listing or after a page of the listing failed.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        repos_dir = Path(tmp) / 'repos'
+        index = {}
+        for name, last_used, size in [('a', 1, 100_000), ('b', 3, 100_000), ('c', 2, 100_000), ('d', 2, 200_000)]:
+            (repos_dir / name).mkdir(parents=True)
+            (repos_dir / name / 'data').write_bytes(b'x' * size)
+            index[name] = {'last_used': last_used, 'size': None}
+        save_index(repos_dir, index)
+        
+        assert enforce_budget(repos_dir, 250_000) == ['a', 'd']
+        assert sorted(path.name for path in repos_dir.iterdir() if path.is_dir()) == ['b', 'c']
+        assert prune_unlisted([], repos_dir) == []
+        
+        # Page 2 of the listing fails: only 'b' is listed, 'c' must survive
+        upstream = Path(tmp) / 'upstream'
+        git('init', '--quiet', str(upstream))
+        (upstream / 'main.py').write_text("print('hi')\n")
+        git('add', '-A', cwd=upstream)
+        git('commit', '--quiet', '-m', 'init', cwd=upstream)
+        (repos_dir / 'b' / 'data').unlink()
+        (repos_dir / 'b').rmdir()
+        git('clone', '--quiet', upstream.as_uri(), str(repos_dir / 'b'))
+        
+        listed = {'name': 'b', 'clone_url': upstream.as_uri(), 'fork': False, 'archived': False}
+        pages = iter([FakeResponse(200, [listed]), FakeResponse(500)])
+        args = loc_counter.build_parser().parse_args(['all', '--username', 'demo', '--repos-dir', str(repos_dir)])
+        state = {}
+        with mock.patch.object(fetch_repos.requests, 'get', lambda *a, **kw: next(pages)):
+            loc_counter.fetch(state, args)
+        assert state['repos'] == [listed] and state['listing_complete'] is False
+        
+        loc_counter.clone(state, args)
+        assert state['successful_repos'] == ['b']
+        assert (repos_dir / 'c').is_dir(), "a partial listing pruned a clone"
 
 
 def test_with_sample_data():
@@ -50,6 +235,39 @@ def test_with_sample_data():
     save_svg_card(sample_data, output_file, username="TestUser")
     print(f"   ✓ Generated SVG card: {output_file}")
     
+    # Test language detection
+    print("\n4. Testing language registry...")
+    assert not is_stale(), "engine/languages.json is out of date, run: python engine/language_registry.py"
+    assert detect_language('main.rs') == 'Rust'
+    assert detect_language('Dockerfile') == 'Dockerfile'
+    assert detect_language('CMakeLists.txt') == 'CMake'
+    assert detect_language('deploy', '#!/usr/bin/env python3') == 'Python'
+    assert detect_language('notes') is None
+    print("   ✓ Detected languages by extension, file name and shebang")
+    
+    # Test the Python counting engine
+    print("\n5. Testing Python counting engine...")
+    skipped = test_engine_parity()
+    if skipped is None:
+        print("   ✓ Same results as loc_runner on a synthetic tree")
+    else:
+        print(f"   ✓ Counted a synthetic tree; parity with loc_runner SKIPPED: {skipped}")
+    
+    # Test incremental rendering
+    print("\n6. Testing incremental README and card updates...")
+    test_incremental_render(sample_data)
+    print("   ✓ Unchanged targets not rewritten, hand-edited block rendered again")
+    
+    # Test marker blocks
+    print("\n7. Testing named marker blocks...")
+    test_named_blocks(sample_data)
+    print("   ✓ Every known block rewritten, unknown block kept, duplicate target written once")
+    
+    # Test the clone store
+    print("\n8. Testing clone store eviction and pruning...")
+    test_clone_store()
+    print("   ✓ Least recently used clones evicted first, nothing pruned on an empty or partial listing")
+    
     # Display output examples
     print("\n" + "="*60)
     print("COMPACT SECTION OUTPUT:")
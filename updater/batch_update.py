@@ -0,0 +1,225 @@
+"""
+Update many README files in one pass.
+
+Each target names a file, its default section style and how many languages
+to show. A file may contain several marker blocks:
+
+    <!-- LOC-STATS:START -->          rendered with the target's section style
+    <!-- LOC-STATS:END -->
+
+    <!-- LOC-STATS:table:START -->    rendered with the named style
+    <!-- LOC-STATS:table:END -->
+
+Every distinct (style, top_n) section is rendered once for all targets, each
+file is rewritten in a single linear scan over its markers, and files are
+read and written concurrently.
+"""
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'renderer'))
+
+from markdown import (
+    generate_compact_section,
+    generate_full_section,
+    generate_markdown_table,
+    generate_badge_section,
+)
+from atomic import write_if_changed
+from render_cache import render_digest, is_fresh, mark_rendered, output_digest
+
+
+# Section styles that can be used as target defaults or block names
+SECTION_RENDERERS = {
+    'compact': generate_compact_section,
+    'full': generate_full_section,
+    'table': generate_markdown_table,
+    'badges': generate_badge_section,
+}
+
+# Styles that contain badges and so accept a badge_base
+BADGE_STYLES = {'compact', 'full', 'badges'}
+
+START_MARKER_RE = re.compile(r'<!-- LOC-STATS(?::([\w-]+))?:START -->')
+
+MAX_WORKERS = 8
+
+
+def end_marker(name: Optional[str]) -> str:
+    """Closing marker for a block (None is the unnamed default block)."""
+    return f"<!-- LOC-STATS:{name}:END -->" if name else "<!-- LOC-STATS:END -->"
+
+
+def find_blocks(content: str) -> List[Tuple[Optional[str], int, int]]:
+    """
+    Locate all marker blocks in a single forward scan.
+
+    Returns:
+        List of (block name, start of body, end of body) tuples, where the body
+        is the text between the start and end markers
+    """
+    blocks = []
+    pos = 0
+
+    while True:
+        match = START_MARKER_RE.search(content, pos)
+        if not match:
+            break
+
+        name = match.group(1)
+        body_end = content.find(end_marker(name), match.end())
+        if body_end == -1:
+            print(f"  Warning: no end marker for {match.group(0)}")
+            break
+
+        blocks.append((name, match.end(), body_end))
+        pos = body_end + len(end_marker(name))
+
+    return blocks
+
+
+def rewrite_blocks(content: str, blocks: List[Tuple[Optional[str], int, int]], sections: List[str]) -> str:
+    """Replace the body of every block with its section, copying everything else once."""
+    pieces = []
+    pos = 0
+
+    for (_, body_start, body_end), section in zip(blocks, sections):
+        pieces.append(content[pos:body_start])
+        pieces.append(f"\n{section}\n")
+        pos = body_end
+
+    pieces.append(content[pos:])
+    return "".join(pieces)
+
+
+def _block_style(target: Dict, name: Optional[str]) -> Optional[str]:
+    """Section style for a block: its own name, or the target default."""
+    style = name or target.get('section_type', 'compact')
+    return style if style in SECTION_RENDERERS else None
+
+
+def dedupe_targets(targets: List[Dict]) -> List[Dict]:
+    """
+    Keep one target per file (by resolved path), so a file listed twice,
+    e.g. as README_PATH and in README_TARGETS, is rendered and written once.
+    The first entry wins; a later one with other settings is reported.
+    """
+    def settings(target):
+        return target.get('section_type', 'compact'), target.get('top_n', 8)
+
+    unique: Dict[Path, Dict] = {}
+    for target in targets:
+        first = unique.setdefault(Path(target['path']).resolve(), target)
+        if first is not target and settings(first) != settings(target):
+            print(f"  Warning: {target['path']} is listed more than once, "
+                  f"using the settings of {first['path']}")
+    return list(unique.values())
+
+
+def _scan(target: Dict) -> Tuple[Dict, Optional[str], list]:
+    path = Path(target['path'])
+    if not path.exists():
+        return target, None, []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return target, content, find_blocks(content)
+
+
+def update_readmes(
+    targets: List[Dict],
+    loc_data: Dict[str, int],
+    cache: dict = None,
+    badge_base: str = None
+) -> Dict[str, str]:
+    """
+    Update the LOC-STATS blocks of many files.
+
+    Args:
+        targets: Dictionaries with `path`, and optionally `section_type`
+            (default 'compact') and `top_n` (default 8)
+        loc_data: Language statistics dictionary
+        cache: Loaded cache.json; when given, files whose inputs did not
+            change since the last run are skipped
+        badge_base: Path or URL of locally rendered badges (see
+            badge_svg.save_badges); shields.io is used when not given
+
+    Returns:
+        Dictionary mapping each target path to 'updated', 'skipped',
+        'missing' (file not found) or 'no-markers'; a file listed more than
+        once appears under its first path only
+    """
+    status = {}
+    targets = dedupe_targets(targets)
+    if not targets:
+        return status
+
+    workers = min(MAX_WORKERS, len(targets))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scanned = list(pool.map(_scan, targets))
+
+    # Render every distinct section once
+    sections: Dict[Tuple[str, int], str] = {}
+    pending = []
+
+    for target, content, blocks in scanned:
+        path = str(target['path'])
+        top_n = target.get('top_n', 8)
+
+        if content is None:
+            print(f"README not found at {path}")
+            status[path] = 'missing'
+            continue
+
+        styles = [_block_style(target, name) for name, _, _ in blocks]
+        for (name, _, _), style in zip(blocks, styles):
+            if style is None:
+                print(f"  Warning: unknown section style '{name}' in {path}, block left as is")
+
+        known = [(block, style) for block, style in zip(blocks, styles) if style]
+        if not known:
+            print(f"Markers not found in {path}. Please add the following lines where you want the stats:")
+            print("<!-- LOC-STATS:START -->")
+            print("<!-- LOC-STATS:END -->")
+            status[path] = 'no-markers'
+            continue
+
+        digest = render_digest(loc_data, 'blocks', top_n, blocks=[style for _, style in known],
+                               badge_base=badge_base)
+        current = output_digest(*(content[start:end] for (_, start, end), _ in known))
+        if cache is not None and is_fresh(cache, path, digest, current):
+            status[path] = 'skipped'
+            continue
+
+        for _, style in known:
+            if (style, top_n) not in sections:
+                options = {'badge_base': badge_base} if style in BADGE_STYLES else {}
+                sections[(style, top_n)] = SECTION_RENDERERS[style](loc_data, top_n, **options)
+
+        rendered = [sections[(style, top_n)] for _, style in known]
+        new_content = rewrite_blocks(content, [block for block, _ in known], rendered)
+        output = output_digest(*(f"\n{section}\n" for section in rendered))
+        pending.append((path, new_content, digest, output))
+
+    def write(item):
+        path, new_content, _, _ = item
+        return write_if_changed(path, new_content)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        written = list(pool.map(write, pending))
+
+    for (path, _, digest, output), was_written in zip(pending, written):
+        status[path] = 'updated' if was_written else 'skipped'
+        if cache is not None:
+            mark_rendered(cache, path, digest, output)
+
+    for path, result in status.items():
+        if result == 'updated':
+            print(f"README updated at {path}")
+        elif result == 'skipped':
+            print(f"README unchanged, skipped {path}")
+
+    return status
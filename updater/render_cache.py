@@ -0,0 +1,112 @@
+"""
+Render-skip cache for the README sections and the SVG card.
+
+Each rendered target is recorded in cache.json together with a digest of the
+inputs it was rendered from and a digest of the output written. When the
+digest of the current inputs matches and the target still holds that output,
+the target is skipped without rendering or touching the file.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Union
+
+from badge import format_number
+
+
+ROOT = Path(__file__).resolve().parent.parent
+RENDERER_DIR = ROOT / 'renderer'
+LANGUAGES_FILE = ROOT / 'engine' / 'languages.json'
+
+
+@lru_cache(maxsize=1)
+def renderer_fingerprint() -> str:
+    """Digest of the renderer sources and languages.json, so template or colour changes invalidate the cache."""
+    sha = hashlib.sha256()
+    for source in sorted(RENDERER_DIR.glob('*.py')) + [LANGUAGES_FILE]:
+        sha.update(source.name.encode())
+        sha.update(source.read_bytes())
+    return sha.hexdigest()
+
+
+def render_digest(
+    loc_data: Dict[str, int],
+    section_type: str,
+    top_n: int = 8,
+    theme: str = 'light',
+    **options
+) -> str:
+    """
+    Digest of everything a rendered target depends on.
+    
+    Args:
+        loc_data: Dictionary mapping languages to line counts
+        section_type: 'compact', 'full' or 'svg'
+        top_n: Number of languages shown
+        theme: Theme of the rendered output
+        **options: Any further rendering options (username, width, ...)
+    
+    Returns:
+        Hex digest string
+    """
+    sorted_langs = sorted(loc_data.items(), key=lambda x: x[1], reverse=True)[:top_n]
+    
+    inputs = {
+        'section': section_type,
+        'top_n': top_n,
+        'theme': theme,
+        'options': options,
+        'languages': [[lang, count, format_number(count)] for lang, count in sorted_langs],
+        'total': sum(loc_data.values()),
+        'language_count': len(loc_data),
+        'renderer': renderer_fingerprint(),
+    }
+    
+    payload = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def target_key(target: str) -> str:
+    """Stable cache key for a target path (relative to the repository when possible)."""
+    path = Path(target).resolve()
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def load_cache(cache_file: str) -> dict:
+    """Load cache.json, or an empty cache if it is missing or unreadable."""
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def output_digest(*parts: Union[str, bytes]) -> str:
+    """Digest of a target's output, given as the parts that were rendered (text or bytes)."""
+    sha = hashlib.sha256()
+    for part in parts:
+        data = part.encode('utf-8') if isinstance(part, str) else part
+        sha.update(len(data).to_bytes(8, 'big'))
+        sha.update(data)
+    return sha.hexdigest()
+
+
+def is_fresh(cache: dict, target: str, digest: str, output: str) -> bool:
+    """
+    True if `target` was last rendered from inputs with `digest` and still
+    holds that output, so hand edits and replaced files are rendered again.
+
+    Args:
+        output: output_digest of the target's current content
+    """
+    entry = cache.get('renders', {}).get(target_key(target))
+    return isinstance(entry, dict) and entry.get('inputs') == digest and entry.get('output') == output
+
+
+def mark_rendered(cache: dict, target: str, digest: str, output: str):
+    """Record that `target` now holds the output (`output` digest) rendered from inputs with `digest`."""
+    cache.setdefault('renders', {})[target_key(target)] = {'inputs': digest, 'output': output}
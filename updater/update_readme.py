@@ -3,21 +3,20 @@ Update GitHub profile README with LOC statistics.
 """
 import json
 import os
-import re
 from datetime import datetime
 from pathlib import Path
 import sys
 
 # Add parent directory to path to import renderer modules (insert at beginning to prioritize)
 sys.path.insert(0, str(Path(__file__).parent.parent / 'renderer'))
+sys.path.insert(1, str(Path(__file__).parent.parent / 'aggregator'))
 
-from markdown import generate_compact_section, generate_full_section
-from svg_card import save_svg_card
-
-
-# Markers for identifying the section to update
-START_MARKER = "<!-- LOC-STATS:START -->"
-END_MARKER = "<!-- LOC-STATS:END -->"
+from card_engine import COMPRESS_FORMATS, compress, compressed_paths, render_variants, resolve_variant, save_card
+from badge_svg import save_badges
+from atomic import atomic_write
+from render_cache import render_digest, load_cache, is_fresh, mark_rendered, output_digest
+from batch_update import update_readmes
+import metrics
 
 
 def load_loc_results(results_file: str = '../aggregator/loc_results.json') -> dict:
@@ -26,26 +25,51 @@ def load_loc_results(results_file: str = '../aggregator/loc_results.json') -> di
         return json.load(f)
 
 
-def update_cache(results: dict, cache_file: str = 'cache.json'):
-    """Update the cache with latest results."""
+def update_cache(results: dict, cache_file: str = 'cache.json', renders: dict = None) -> bool:
+    """
+    Update the cache with latest results.
+    
+    The file (and its `last_update` timestamp) is only rewritten when the
+    statistics or the render digests changed.
+    
+    Args:
+        results: Aggregation results
+        cache_file: Path to cache.json
+        renders: Render digests per target; kept as-is when not given
+    
+    Returns:
+        True if the cache was written, False if it was already up to date
+    """
+    previous = load_cache(cache_file)
     cache = {
-        'last_update': datetime.now().isoformat(),
+        'last_update': previous.get('last_update'),
         'languages': results['languages'],
         'total_lines': sum(results['languages'].values()),
-        'repos_processed': results['processed_repos']
+        'repos_processed': results['processed_repos'],
+        'renders': renders if renders is not None else previous.get('renders', {})
     }
     
-    with open(cache_file, 'w') as f:
-        json.dump(cache, f, indent=2)
+    unchanged = {k: v for k, v in cache.items() if k != 'last_update'} == \
+        {k: v for k, v in previous.items() if k != 'last_update'}
+    if unchanged:
+        print(f"Cache unchanged: {cache['total_lines']:,} total lines")
+        return False
+    
+    cache['last_update'] = datetime.now().isoformat()
+    atomic_write(cache_file, json.dumps(cache, indent=2))
     
     print(f"Cache updated: {cache['total_lines']:,} total lines")
+    return True
 
 
 def update_readme(
     readme_path: str,
     loc_data: dict,
     section_type: str = 'compact',
-    username: str = 'User'
+    username: str = 'User',
+    top_n: int = 8,
+    cache: dict = None,
+    skipped: list = None
 ) -> bool:
     """
     Update the README file with LOC statistics.
@@ -55,51 +79,147 @@ def update_readme(
         loc_data: Language statistics dictionary
         section_type: 'compact' or 'full'
         username: GitHub username for the SVG card
+        top_n: Number of languages to show
+        cache: Loaded cache.json; when given, the README is skipped without
+            rendering if its inputs did not change since the last run
+        skipped: List that skipped target paths are appended to
     
     Returns:
-        True if updated, False if markers not found
+        True if the README is up to date (written or skipped), False if it
+        or the markers were not found
     """
-    readme_path = Path(readme_path)
+    target = {'path': str(readme_path), 'section_type': section_type, 'top_n': top_n}
+    return update_targets([target], loc_data, cache, skipped)
+
+
+def update_targets(
+    targets: list,
+    loc_data: dict,
+    cache: dict = None,
+    skipped: list = None,
+    badge_base: str = None
+) -> bool:
+    """
+    Update several README targets in one batch (see batch_update.update_readmes).
     
-    if not readme_path.exists():
-        print(f"README not found at {readme_path}")
-        return False
+    Returns:
+        True if every target is up to date, False if any was missing or had no markers
+    """
+    status = update_readmes(targets, loc_data, cache, badge_base)
     
-    # Read current README
-    with open(readme_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if skipped is not None:
+        skipped.extend(path for path, result in status.items() if result == 'skipped')
     
-    # Check if markers exist
-    if START_MARKER not in content or END_MARKER not in content:
-        print("Markers not found in README. Please add the following lines where you want the stats:")
-        print(START_MARKER)
-        print(END_MARKER)
-        return False
+    return all(result in ('updated', 'skipped') for result in status.values())
+
+
+def load_targets(targets_file: str) -> list:
+    """
+    Load README targets from a JSON file, e.g.
     
-    # Generate new section
-    if section_type == 'compact':
-        new_section = generate_compact_section(loc_data)
-    else:
-        new_section = generate_full_section(loc_data)
+        [{"path": "README.md", "section_type": "compact", "top_n": 8},
+         {"path": "docs/stats.md", "section_type": "full", "top_n": 12}]
     
-    # Replace the section between markers
-    pattern = f"{re.escape(START_MARKER)}.*?{re.escape(END_MARKER)}"
-    replacement = f"{START_MARKER}\n{new_section}\n{END_MARKER}"
+    Relative paths are resolved against the directory of the targets file.
+    """
+    targets_file = Path(targets_file)
+    with open(targets_file, 'r') as f:
+        targets = json.load(f)
     
-    new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
+    for target in targets:
+        target['path'] = str(targets_file.parent / target['path'])
+    return targets
+
+
+def max_top_n(targets_file: str = None, default: int = 8) -> int:
+    """Largest top_n requested by any target, i.e. how many badges are needed."""
+    top_n = default
+    if targets_file:
+        top_n = max([top_n] + [t.get('top_n', default) for t in load_targets(targets_file)])
+    return top_n
+
+
+# Card rendered when no variants are configured
+DEFAULT_CARD = {'name': 'loc_stats'}
+
+
+def load_card_variants(variants_file: str = None) -> list:
+    """Card variants from a JSON list of card_engine variants; just the default card when not given."""
+    if not variants_file:
+        return [DEFAULT_CARD]
+    with open(variants_file, 'r') as f:
+        return json.load(f)
+
+
+def parse_formats(text: str = None) -> list:
+    """Parse a comma-separated list of compressed copies to write, e.g. 'svgz,gz'."""
+    formats = [fmt.strip() for fmt in (text or '').split(',') if fmt.strip()]
+    for fmt in formats:
+        if fmt not in COMPRESS_FORMATS:
+            raise ValueError(f"Unknown compression format '{fmt}', expected one of {COMPRESS_FORMATS}")
+    return formats
+
+
+def card_output(svg_path: Path, formats: list) -> str:
+    """output_digest of a card and its compressed copies as found on disk ('' if any is missing)."""
+    try:
+        return output_digest(*(path.read_bytes() for path in [svg_path] + compressed_paths(svg_path, formats)))
+    except OSError:
+        return ''
+
+
+def generate_svg(
+    loc_data: dict,
+    username: str,
+    output_dir: str = '.',
+    cache: dict = None,
+    skipped: list = None,
+    variants: list = None,
+    formats: list = ()
+):
+    """
+    Generate the SVG card variants in one pass and save them (plus .svgz/.svg.gz
+    copies for each entry of `formats`), skipping variants whose inputs did
+    not change.
+    """
+    pending = []
+    for variant in map(resolve_variant, variants or [DEFAULT_CARD]):
+        output_path = Path(output_dir) / f"{variant['name']}.svg"
+        digest = render_digest(loc_data, 'svg', variant['top_n'], variant['theme'], username=username,
+                               layout=variant['layout'], width=variant['width'], formats=list(formats))
+        if cache is not None and is_fresh(cache, output_path, digest, card_output(output_path, formats)):
+            print(f"SVG card unchanged, skipped {output_path}")
+            if skipped is not None:
+                skipped.append(str(output_path))
+            continue
+        pending.append((variant, output_path, digest))
     
-    # Write updated README
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+    if not pending:
+        return
     
-    print(f"README updated at {readme_path}")
-    return True
+    rendered = render_variants(loc_data, [variant for variant, _, _ in pending], username)
+    for variant, output_path, digest in pending:
+        svg = rendered[variant['name']]
+        written = save_card(svg, output_path, formats)
+        if written:
+            print(f"SVG card saved to {output_path}")
+        else:
+            print(f"SVG card unchanged at {output_path}")
+            if skipped is not None:
+                skipped.append(str(output_path))
+        if cache is not None:
+            compressed = [compress(svg)] * len(formats)
+            mark_rendered(cache, output_path, digest, output_digest(svg, *compressed))
 
 
-def generate_svg(loc_data: dict, username: str, output_dir: str = '.'):
-    """Generate SVG card and save it."""
-    output_path = Path(output_dir) / 'loc_stats.svg'
-    save_svg_card(loc_data, str(output_path), username)
+def report_skipped(skipped: list):
+    """Print the targets that were left untouched."""
+    if skipped:
+        print(f"\nSkipped {len(skipped)} unchanged target(s):")
+        for target in skipped:
+            print(f"  - {target}")
+    else:
+        print("\nNo targets skipped")
 
 
 def main():
@@ -109,9 +229,17 @@ def main():
     # Get configuration from environment
     readme_path = os.environ.get('README_PATH', '../README.md')
     profile_readme_path = os.environ.get('PROFILE_README_PATH')
+    targets_file = os.environ.get('README_TARGETS')
+    badge_base = os.environ.get('BADGE_BASE_URL')
+    badge_dir = os.environ.get('BADGE_DIR', 'badges')
+    badge_style = os.environ.get('BADGE_STYLE', 'flat-square')
     username = os.environ.get('GITHUB_USERNAME', 'User')
     section_type = os.environ.get('SECTION_TYPE', 'compact')
     generate_svg_flag = os.environ.get('GENERATE_SVG', 'true').lower() == 'true'
+    card_variants = load_card_variants(os.environ.get('CARD_VARIANTS'))
+    svg_formats = parse_formats(os.environ.get('COMPRESS_SVG'))
+    metrics_file = os.environ.get('METRICS_FILE', '../aggregator/metrics.jsonl')
+    trace_file = os.environ.get('TRACE_FILE', '../aggregator/trace.json')
     
     # Load results
     print("Loading LOC results...")
@@ -125,30 +253,50 @@ def main():
         print(f"Error loading results: {e}")
         return
     
-    # Update cache
-    print("Updating cache...")
-    update_cache(results)
+    cache_file = 'cache.json'
+    cache = load_cache(cache_file)
+    skipped = []
     
-    # Update README
-    print(f"Updating README at {readme_path}...")
-    if update_readme(readme_path, loc_data, section_type, username):
-        print("✓ README updated successfully")
-    else:
-        print("✗ Failed to update README")
-    
-    # Update profile README if specified
-    if profile_readme_path:
-        print(f"\nUpdating profile README at {profile_readme_path}...")
-        if update_readme(profile_readme_path, loc_data, section_type, username):
-            print("✓ Profile README updated successfully")
+    with metrics.span('update', 'updater'):
+        # Render local badges in one pass if the README should point at them
+        if badge_base:
+            print(f"Rendering badges to {badge_dir}...")
+            with metrics.span('save_badges', 'updater'):
+                save_badges(loc_data, badge_dir, max_top_n(targets_file), badge_style)
+        
+        # Update all README targets in one batch
+        targets = [{'path': readme_path, 'section_type': section_type}]
+        if profile_readme_path:
+            targets.append({'path': profile_readme_path, 'section_type': section_type})
+        if targets_file:
+            targets.extend(load_targets(targets_file))
+        
+        print(f"Updating {len(targets)} README target(s)...")
+        with metrics.span('update_readmes', 'updater', targets=len(targets)) as attrs:
+            attrs['ok'] = update_targets(targets, loc_data, cache, skipped, badge_base)
+        if attrs['ok']:
+            print("✓ READMEs up to date")
         else:
-            print("✗ Failed to update profile README")
+            print("✗ Failed to update some READMEs")
+        
+        # Generate SVG if requested
+        if generate_svg_flag:
+            print("\nGenerating SVG card(s)...")
+            with metrics.span('generate_svg', 'updater', variants=len(card_variants)):
+                generate_svg(loc_data, username, cache=cache, skipped=skipped,
+                             variants=card_variants, formats=svg_formats)
+            print("✓ SVG cards up to date")
+        
+        # Update cache last, so it records the digests of what was rendered
+        print("\nUpdating cache...")
+        with metrics.span('update_cache', 'updater'):
+            update_cache(results, cache_file, cache.get('renders', {}))
+    
+    report_skipped(skipped)
     
-    # Generate SVG if requested
-    if generate_svg_flag:
-        print("\nGenerating SVG card...")
-        generate_svg(loc_data, username)
-        print("✓ SVG card generated")
+    # Append to the files written by the aggregation run
+    metrics.write_metrics(metrics_file, append=True)
+    metrics.write_trace(trace_file, append=True)
     
     print("\n=== Update Complete ===")
 